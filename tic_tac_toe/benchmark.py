@@ -0,0 +1,316 @@
+"""Headless benchmarks for the tic-tac-toe engine.
+
+Drives ``TicTacToeGame`` directly, without a window, through three kinds of
+runs on every board configuration:
+
+- ``ai-vs-ai``: the engine plays both sides;
+- ``ai-vs-random``: the engine plays "O" against a seeded random "X";
+- ``positions``: the engine answers a fixed set of positions.
+
+Results can be saved as a JSON baseline and later runs compared against it.
+Node counts do not depend on the machine, so they catch search regressions
+exactly. Timings pool every move of at least ``--repeat`` runs, and short
+runs are repeated until they add up to MIN_TIMED_SECONDS, so that even
+the 3x3 suites give stable numbers; they are compared within a looser
+tolerance:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Sequence
+
+from main import Move, TicTacToeGame
+
+BASELINE_VERSION = 1
+DEFAULT_NODE_TOLERANCE = 0.0
+DEFAULT_TIME_TOLERANCE = 0.5
+DEFAULT_REPEAT = 3
+MIN_TIMED_SECONDS = 1.0
+MAX_REPEAT = 200
+KINDS = ("ai-vs-ai", "ai-vs-random", "positions")
+
+SUITES = {
+    "3x3": dict(board_size=3, use_perfect_play=False),
+    "4x4": dict(board_size=4, max_depth=4, use_perfect_play=False),
+    "6x6-k4": dict(board_size=6, win_length=4, max_depth=3),
+    "15x15-k5": dict(board_size=15, win_length=5, max_depth=2),
+}
+
+# Positions with "O" to move, one row per string.
+POSITIONS = {
+    "3x3": [
+        ".X./..X/OOX",
+        "OOX/X../.OX",
+        "XOX/.O./OXX",
+        "X../.../...",
+    ],
+    "4x4": [
+        "X.../.O../..X./....",
+        "XO../.X../..O./...X",
+        "X..X/.OO./.X../....",
+    ],
+    "6x6-k4": [
+        "....../..X.../...O../..X.../....../......",
+        "....../.XX.../..OO../...X../....../......",
+    ],
+    "15x15-k5": [
+        "/".join("......." + ("X" if row == 7 else ".") + "......."
+                 for row in range(15)),
+        "/".join("......." + {6: "O", 7: "X", 8: "X"}.get(row, ".") + "......."
+                 for row in range(15)),
+    ],
+}
+
+
+def parse_position(position: str) -> List[List[Move]]:
+    return [
+        [Move(row, col, "" if label == "." else label)
+         for col, label in enumerate(line)]
+        for row, line in enumerate(position.split("/"))
+    ]
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of values."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class SuiteRun:
+    """Accumulates per-move nodes, latencies and game outcomes."""
+
+    def __init__(self):
+        self.move_nodes: List[int] = []
+        self.move_times: List[float] = []
+        self.outcomes: Dict[str, int] = {}
+
+    def add_stats(self, game: TicTacToeGame):
+        stats = game.search_stats()
+        self.move_nodes.extend(stats.move_nodes)
+        self.move_times.extend(stats.move_times)
+
+    def add_outcome(self, outcome: str):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def summary(self) -> dict:
+        seconds = sum(self.move_times)
+        nodes = sum(self.move_nodes)
+        return {
+            "moves": len(self.move_times),
+            "nodes": nodes,
+            "seconds": round(seconds, 6),
+            "nodes_per_sec": round(nodes / seconds, 1) if seconds else 0.0,
+            "moves_per_sec": round(len(self.move_times) / seconds, 2) if seconds else 0.0,
+            "latency_ms": {
+                name: round(percentile(self.move_times, fraction) * 1000, 3)
+                for name, fraction in (("p50", 0.5), ("p90", 0.9),
+                                       ("p99", 0.99), ("max", 1.0))
+            },
+            "outcomes": dict(sorted(self.outcomes.items())),
+        }
+
+
+def _outcome(game: TicTacToeGame) -> str:
+    if game.has_winner():
+        row, col = game.winner_combo[0]
+        return game._current_moves[row][col].label
+    return "tie"
+
+
+def _mirrored_move(game: TicTacToeGame, mirror: TicTacToeGame) -> Move:
+    """Ask mirror for "X"'s move by searching the colour-swapped board."""
+    swap = {"X": "O", "O": "X", "": ""}
+    mirror.set_board([
+        [Move(move.row, move.col, swap[move.label]) for move in row]
+        for row in game._current_moves
+    ])
+    move = mirror._process_computer_move()
+    return Move(move.row, move.col, "X")
+
+
+def play_games(config: dict, games: int, opponent: str, seed: int) -> SuiteRun:
+    run = SuiteRun()
+    rng = random.Random(seed)
+    engine = TicTacToeGame(trace=True, **config)
+    mirror = TicTacToeGame(trace=True, **config) if opponent == "ai" else None
+    size = engine.board_size
+    for number in range(games):
+        if number % 2:
+            engine.new_game_computer()
+        else:
+            engine.new_game_player()
+        label = engine.current_player.label
+        while not engine.has_winner() and not engine.is_tied():
+            if label == "O":
+                engine._process_computer_move()
+            else:
+                if mirror is not None:
+                    move = _mirrored_move(engine, mirror)
+                else:
+                    empty = [index for index, label in enumerate(engine._cells)
+                             if label == ""]
+                    move = Move(*divmod(rng.choice(empty), size), "X")
+                engine.process_move(move)
+            label = "X" if label == "O" else "O"
+        run.add_outcome(_outcome(engine))
+    run.add_stats(engine)
+    if mirror is not None:
+        run.add_stats(mirror)
+    engine.close()
+    return run
+
+
+def answer_positions(config: dict, positions: Sequence[str]) -> SuiteRun:
+    run = SuiteRun()
+    engine = TicTacToeGame(trace=True, **config)
+    for position in positions:
+        engine.reset_game()
+        engine.set_board(parse_position(position))
+        engine._process_computer_move()
+    run.add_stats(engine)
+    engine.close()
+    return run
+
+
+def repeated_summary(run_once: Callable[[], SuiteRun], repeat: int) -> dict:
+    """Summarise at least repeat runs, repeating until MIN_TIMED_SECONDS are timed.
+
+    Moves, nodes and outcomes are those of one run; the timings pool the
+    moves of every run, and seconds is the mean per run.
+    """
+    pooled = SuiteRun()
+    single = None
+    runs = 0
+    while runs < repeat or (sum(pooled.move_times) < MIN_TIMED_SECONDS
+                            and runs < MAX_REPEAT):
+        run = run_once()
+        single = single or run.summary()
+        pooled.move_nodes.extend(run.move_nodes)
+        pooled.move_times.extend(run.move_times)
+        runs += 1
+    summary = pooled.summary()
+    summary.update(moves=single["moves"], nodes=single["nodes"],
+                   outcomes=single["outcomes"], runs=runs,
+                   seconds=round(summary["seconds"] / runs, 6))
+    return summary
+
+
+def run_benchmarks(suites: Sequence[str], games: int, seed: int,
+                   repeat: int = DEFAULT_REPEAT) -> dict:
+    results = {}
+    for name in suites:
+        config = SUITES[name]
+        runs = {
+            "ai-vs-ai": lambda: play_games(config, games, "ai", seed),
+            "ai-vs-random": lambda: play_games(config, games, "random", seed),
+            "positions": lambda: answer_positions(config, POSITIONS[name]),
+        }
+        results[name] = {"config": config}
+        for kind in KINDS:
+            results[name][kind] = repeated_summary(runs[kind], repeat)
+    return {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "games": games,
+        "seed": seed,
+        "repeat": repeat,
+        "suites": results,
+    }
+
+
+def compare(current: dict, baseline: dict, node_tolerance: float,
+            time_tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed past its tolerance."""
+    regressions = []
+    for name, suite in current["suites"].items():
+        for kind in KINDS:
+            old = baseline.get("suites", {}).get(name, {}).get(kind)
+            if old is None:
+                continue
+            new = suite[kind]
+            checks = [
+                ("nodes", new["nodes"], old["nodes"], True, node_tolerance),
+                ("latency p50", new["latency_ms"]["p50"],
+                 old["latency_ms"]["p50"], True, time_tolerance),
+                ("nodes/sec", new["nodes_per_sec"], old["nodes_per_sec"],
+                 False, time_tolerance),
+            ]
+            for metric, value, reference, lower_is_better, tolerance in checks:
+                if not reference:
+                    continue
+                change = (value - reference) / reference
+                if not lower_is_better:
+                    change = -change
+                if change > tolerance:
+                    regressions.append(
+                        f"{name} {kind}: {metric} {reference} -> {value} "
+                        f"({change:+.0%} worse)")
+    return regressions
+
+
+def print_report(results: dict):
+    header = (f"{'suite':<10} {'run':<13} {'moves':>6} {'nodes':>9} {'nodes/s':>10} "
+              f"{'moves/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}  outcomes")
+    print(header)
+    for name, suite in results["suites"].items():
+        for kind in KINDS:
+            row = suite[kind]
+            latency = row["latency_ms"]
+            print(f"{name:<10} {kind:<13} {row['moves']:>6} {row['nodes']:>9} "
+                  f"{row['nodes_per_sec']:>10.0f} {row['moves_per_sec']:>8.1f} "
+                  f"{latency['p50']:>8.2f} {latency['p90']:>8.2f} {latency['p99']:>8.2f}  "
+                  f"{row['outcomes'] or ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tic-tac-toe engine.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="suite to run, may be repeated (default: all)")
+    parser.add_argument("--games", type=int, default=2,
+                        help="games per suite for the ai-vs-ai and ai-vs-random runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="least runs per benchmark; timings pool all of them")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--node-tolerance", type=float, default=DEFAULT_NODE_TOLERANCE,
+                        help="allowed relative increase in nodes searched")
+    parser.add_argument("--time-tolerance", type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help="allowed relative slowdown in latency and nodes/sec")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = run_benchmarks(args.suite or list(SUITES), args.games, args.seed,
+                             args.repeat)
+    print_report(results)
+    print(f"Finished in {time.perf_counter() - started:.1f}s")
+
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+            baseline_file.write("\n")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.node_tolerance,
+                              args.time_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
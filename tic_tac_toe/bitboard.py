@@ -0,0 +1,122 @@
+"""Bitboard backend for the tic-tac-toe engine.
+
+The position is kept as two integers, one bitmask per player, where bit
+``row * board_size + col`` is set when that player owns the cell. Wins are
+detected with precomputed line masks, so a search node costs a handful of
+integer operations instead of building ``Move`` tuples and sets.
+"""
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+class _Cancelled(Exception):
+    """Unwinds the search once is_cancelled() has become true."""
+
+
+class BitBoard:
+    """A position stored as one integer bitmask per player."""
+
+    __slots__ = ("board_size", "line_masks", "full_mask", "x_mask", "o_mask",
+                 "_is_cancelled")
+
+    def __init__(self, board_size: int, combos: Sequence[Sequence[Tuple[int, int]]]):
+        self.board_size = board_size
+        self.line_masks = [
+            sum(1 << self.cell_index(row, col) for row, col in combo)
+            for combo in combos
+        ]
+        self.full_mask = (1 << (board_size * board_size)) - 1
+        self.x_mask = 0
+        self.o_mask = 0
+        self._is_cancelled = lambda: False
+
+    def cell_index(self, row: int, col: int) -> int:
+        return row * self.board_size + col
+
+    def cell_position(self, index: int) -> Tuple[int, int]:
+        return divmod(index, self.board_size)
+
+    def empty_cells(self) -> List[int]:
+        """Return the indexes of the empty cells in row-major order."""
+        occupied = self.x_mask | self.o_mask
+        return [
+            index for index in range(self.board_size * self.board_size)
+            if not occupied >> index & 1
+        ]
+
+    def winning_line(self, player_mask: int) -> Optional[int]:
+        """Return the first line mask fully owned by player_mask, if any."""
+        for line in self.line_masks:
+            if player_mask & line == line:
+                return line
+        return None
+
+    def best_move(self, score_table,
+                  is_cancelled: Callable[[], bool] = lambda: False
+                  ) -> Tuple[Optional[int], Optional[float]]:
+        """Return the best cell index for "O" and its minimax score.
+
+        Mirrors ``TicTacToeGame._process_computer_move``: every root move is
+        searched with a full window and ties keep the first move in
+        row-major order. is_cancelled() is checked at every node; returns
+        (None, None) once it is true.
+        """
+        best_score = float("-inf")
+        best_index = None
+        self._is_cancelled = is_cancelled
+        try:
+            for index in self.empty_cells():
+                score = self._minimax(self.x_mask, self.o_mask | 1 << index,
+                                      0, float("-inf"), float("inf"), False,
+                                      score_table["X"], score_table["O"])
+                if score > best_score:
+                    best_score = score
+                    best_index = index
+        except _Cancelled:
+            return None, None
+        finally:
+            self._is_cancelled = lambda: False
+        return best_index, best_score
+
+    def _minimax(self, x_mask, o_mask, depth, alpha, beta, is_maximizing,
+                 x_score, o_score):
+        if self._is_cancelled():
+            raise _Cancelled
+        # The player who just moved is the only one who can have a new line.
+        last_mask = x_mask if is_maximizing else o_mask
+        for line in self.line_masks:
+            if last_mask & line == line:
+                return x_score + depth if is_maximizing else o_score - depth
+        occupied = x_mask | o_mask
+        if occupied == self.full_mask:
+            return 0
+        depth += 1
+
+        free = ~occupied & self.full_mask
+        if is_maximizing:
+            best_score = float("-inf")
+            while free:
+                bit = free & -free
+                free ^= bit
+                score = self._minimax(x_mask, o_mask | bit, depth, alpha,
+                                      beta, False, x_score, o_score)
+                if score > best_score:
+                    best_score = score
+                if score > alpha:
+                    alpha = score
+                if beta <= alpha:
+                    break
+            return best_score
+        else:
+            best_score = float("inf")
+            while free:
+                bit = free & -free
+                free ^= bit
+                score = self._minimax(x_mask | bit, o_mask, depth, alpha,
+                                      beta, True, x_score, o_score)
+                if score < best_score:
+                    best_score = score
+                if score < beta:
+                    beta = score
+                if beta <= alpha:
+                    break
+            return best_score
@@ -0,0 +1,100 @@
+"""Picks a search engine for a position from its estimated search cost.
+
+``TicTacToeGame(engine="auto")`` asks choose_engine() for every computer
+move the perfect-play table and tablebases do not answer. The
+candidates, strongest first:
+
+- "exhaustive": alpha-beta to the end of the game; plays perfectly.
+- "depth-limited": iterative-deepening alpha-beta to the deepest depth
+  that fits the latency target, chosen when that is at least min_depth.
+- "mcts": Monte Carlo tree search for the latency target.
+
+The first candidate whose estimated time fits the latency target wins,
+and minimax also gets the target as its time budget, so a wrong estimate
+costs at most the target. The cost model was fitted to node counts of
+the minimax engine on 3x3 to 19x19 boards: a search over ``empty``
+cells to ``depth`` plies can reach
+
+    positions = sum(comb(empty, j) * comb(j, j // 2) for j <= depth)
+
+positions, and alpha-beta with the transposition table and move
+ordering visits about ``positions ** exponent`` of them. Shorter winning
+lines end games sooner, which the exhaustive exponent accounts for.
+"""
+from math import comb, log10
+from typing import NamedTuple, Optional
+
+AUTO_LATENCY = 2.0
+AUTO_MIN_DEPTH = 3
+# log10(nodes) = EXHAUSTIVE_OFFSET + EXHAUSTIVE_EXPONENT * log10(positions),
+# scaled by (win_length / board_size) ** WIN_LENGTH_EXPONENT.
+EXHAUSTIVE_OFFSET = 0.25
+EXHAUSTIVE_EXPONENT = 0.78
+WIN_LENGTH_EXPONENT = 0.78
+DEPTH_LIMITED_EXPONENT = 0.70
+# Seconds per node grow with the board, mostly from the heuristic evaluation.
+NODE_SECONDS = 1e-5
+CELL_NODE_SECONDS = 3.4e-7
+
+
+class EngineChoice(NamedTuple):
+    """The engine picked for one move and the cost it was picked on.
+
+    nodes is the estimated minimax nodes, 0 for MCTS, which spends its
+    whole time budget.
+    """
+    strategy: str
+    engine: str
+    max_depth: Optional[int]
+    time_budget: Optional[float]
+    nodes: float
+    seconds: float
+
+
+def reachable_positions(empty: int, depth: Optional[int] = None) -> int:
+    """Return how many ways the next depth plies can fill empty cells, alternating sides."""
+    plies = empty if depth is None else min(depth, empty)
+    return sum(comb(empty, placed) * comb(placed, placed // 2)
+               for placed in range(plies + 1))
+
+
+def estimate_nodes(board_size: int, win_length: int, empty: int,
+                   depth: Optional[int] = None) -> float:
+    """Estimate the nodes the minimax engine visits searching depth plies (None: to the end)."""
+    positions = log10(reachable_positions(empty, depth))
+    if depth is None or depth >= empty:
+        scale = (win_length / board_size) ** WIN_LENGTH_EXPONENT
+        return 10 ** ((EXHAUSTIVE_OFFSET + EXHAUSTIVE_EXPONENT * positions) * scale)
+    return 10 ** (DEPTH_LIMITED_EXPONENT * positions)
+
+
+def estimate_seconds(board_size: int, nodes: float) -> float:
+    return nodes * (NODE_SECONDS + CELL_NODE_SECONDS * board_size * board_size)
+
+
+def choose_engine(board_size: int, win_length: int, empty: int,
+                  latency: float = AUTO_LATENCY,
+                  min_depth: int = AUTO_MIN_DEPTH) -> EngineChoice:
+    """Return the strongest engine estimated to answer within latency seconds.
+
+    A depth-limited search counts only if it can finish min_depth plies;
+    below that Monte Carlo tree search plays better in the same time.
+    """
+    nodes = estimate_nodes(board_size, win_length, empty)
+    seconds = estimate_seconds(board_size, nodes)
+    if seconds <= latency:
+        return EngineChoice("exhaustive", "minimax", None, latency, nodes, seconds)
+    best = None
+    # Iterative deepening searches every depth up to the last one.
+    nodes = 0.0
+    for depth in range(1, empty):
+        nodes += estimate_nodes(board_size, win_length, empty, depth)
+        seconds = estimate_seconds(board_size, nodes)
+        if seconds > latency:
+            break
+        if depth >= min_depth:
+            best = EngineChoice("depth-limited", "minimax", depth, latency,
+                                nodes, seconds)
+    if best is not None:
+        return best
+    return EngineChoice("mcts", "mcts", None, latency, 0.0, latency)
@@ -0,0 +1,88 @@
+"""Compact position encodings.
+
+A position is encoded as a single integer: cell ``row * board_size + col``
+is base-3 digit number ``index``, holding 0 for an empty cell, 1 for "X"
+and 2 for "O". The integer is exact, hashable and cheap to pickle, so it
+serves as a dict key, a transposition-table key and the format positions
+are sent to worker processes in. It converts to a few bytes for storage
+and to one bitmask per player for the bitboard backend.
+"""
+from typing import List, Sequence, Tuple
+
+CELL_VALUES = {"": 0, "X": 1, "O": 2}
+LABELS = ("", "X", "O")
+_DIGITS = {"": "0", "X": "1", "O": "2"}
+
+
+def encode(cells: Sequence[str]) -> int:
+    """Return the key of a row-major sequence of cell labels."""
+    # int() parses the digits in C; the last cell is the most significant.
+    return int("".join([_DIGITS[label] for label in reversed(cells)]) or "0", 3)
+
+
+def decode(key: int, cell_count: int) -> List[str]:
+    """Return the row-major cell labels of key."""
+    if not 0 <= key < 3 ** cell_count:
+        raise ValueError(f"{key} is not a position key for {cell_count} cells")
+    cells = []
+    for _ in range(cell_count):
+        key, value = divmod(key, 3)
+        cells.append(LABELS[value])
+    return cells
+
+
+def byte_length(cell_count: int) -> int:
+    """Return the number of bytes to_bytes() uses for cell_count cells."""
+    return ((3 ** cell_count - 1).bit_length() + 7) // 8
+
+
+def to_bytes(key: int, cell_count: int) -> bytes:
+    """Return key as little-endian bytes; 2 bytes for 3x3, 4 for 4x4."""
+    return key.to_bytes(byte_length(cell_count), "little")
+
+
+def from_bytes(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+def to_masks(cells: Sequence[str]) -> Tuple[int, int]:
+    """Return (x_mask, o_mask) with bit index set where that player owns the cell."""
+    x_mask = o_mask = 0
+    for index, label in enumerate(cells):
+        if label == "X":
+            x_mask |= 1 << index
+        elif label == "O":
+            o_mask |= 1 << index
+    return x_mask, o_mask
+
+
+def from_masks(x_mask: int, o_mask: int, cell_count: int) -> List[str]:
+    """Return the row-major cell labels of a pair of player bitmasks."""
+    if x_mask & o_mask:
+        raise ValueError("a cell cannot belong to both players")
+    return [
+        "X" if x_mask >> index & 1 else "O" if o_mask >> index & 1 else ""
+        for index in range(cell_count)
+    ]
+
+
+def cell_name(index: int, board_size: int) -> str:
+    """Return the name of a cell in engine-protocol notation, e.g. "b3".
+
+    Columns are letters from "a" and rows are numbered from 1, both
+    counted from the top-left corner.
+    """
+    row, col = divmod(index, board_size)
+    return f"{chr(ord('a') + col)}{row + 1}"
+
+
+def parse_cell_name(name: str, board_size: int) -> int:
+    """Return the cell index of a name produced by cell_name()."""
+    col = ord(name[:1].lower()) - ord("a") if name else -1
+    try:
+        row = int(name[1:]) - 1
+    except ValueError:
+        row = -1
+    if not (0 <= row < board_size and 0 <= col < board_size):
+        raise ValueError(f"{name!r} is not a cell of a {board_size}x{board_size} board")
+    return row * board_size + col
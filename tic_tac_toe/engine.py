@@ -0,0 +1,361 @@
+"""Tic-tac-toe engine speaking a UCI-style text protocol on stdin/stdout.
+
+Commands are read one per line; answers are written one per line and
+flushed at once:
+
+    uci                                  id name ..., option ..., uciok
+    isready                              readyok
+    setoption name Engine value mcts
+    ucinewgame
+    position size 4 win 3 [key 0] [tomove x] [moves b2 c3 ...]
+    go [movetime 500] [nodes 20000] [depth 3] [infinite]
+                                         info nodes N time MS
+                                         bestmove b1
+    stop                                 ends the search; bestmove follows
+    quit
+
+Cells are named by column letter and row number from the top-left
+corner, so "a1" is row 0, column 0 (see ``encoding.cell_name``).
+"position" starts from the encoded position ``key`` (default: the empty
+board) with ``tomove`` to move (default: "x" unless "x" has more pieces)
+and plays the listed moves alternately. "go" searches for the side to
+move in a background thread, so "stop" and "isready" are answered while
+it thinks; other commands wait for the search to finish. "go infinite"
+deepens without a time limit and answers only after "stop". A stopped
+search answers with the best move of its last finished iteration, or
+the first move of the move ordering if none finished. A "go" that
+fails answers with an "info string error" line and "bestmove none".
+
+The process can be pinned to CPUs and given a memory limit, which lets a
+front-end run, compare and restart engines in isolation:
+
+    python engine.py --engine mcts --cpus 2,3 --memory-limit 512
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+from encoding import cell_name, decode, parse_cell_name
+from main import (ENGINES, LARGE_BOARD_DEPTH, LARGE_BOARD_SIZE, SearchCancelled,
+                  TicTacToeGame)
+from transposition import DEFAULT_TT_SIZE
+
+ENGINE_NAME = "tic_tac_toe"
+ENGINE_AUTHOR = "tic_tac_toe contributors"
+DEFAULT_OPTIONS = {
+    "Engine": "minimax",
+    "Hash": DEFAULT_TT_SIZE,
+    "Cache": "",
+    "Workers": 1,
+    "PerfectPlay": True,
+}
+OPTION_DESCRIPTIONS = (
+    "option name Engine type combo default {Engine} " + " ".join(
+        f"var {engine}" for engine in ENGINES),
+    "option name Hash type spin default {Hash} min 0 max 67108864",
+    "option name Cache type string default {Cache}",
+    "option name Workers type spin default {Workers} min 1 max 256",
+    "option name PerfectPlay type check default {PerfectPlay}",
+)
+
+
+class ProtocolError(Exception):
+    """A command that is answered with an "info string error" line."""
+
+
+def _swap_labels(cells: List[str]) -> List[str]:
+    swapped = {"X": "O", "O": "X", "": ""}
+    return [swapped[label] for label in cells]
+
+
+class EngineProtocol:
+    """Runs the protocol for one input stream, searching with a TicTacToeGame.
+
+    The game always searches for "O", so positions with "X" to move are
+    searched with the labels swapped.
+    """
+
+    def __init__(self, output: TextIO = sys.stdout,
+                 options: Optional[Dict[str, object]] = None):
+        self.output = output
+        self.options = dict(DEFAULT_OPTIONS, **(options or {}))
+        self.game: Optional[TicTacToeGame] = None
+        self._board_size = 3
+        self._win_length = 3
+        self._cells = [""] * 9
+        self._to_move = "X"
+        self._search_thread: Optional[threading.Thread] = None
+        self._infinite = False
+        self._stopped = threading.Event()
+        self._output_lock = threading.Lock()
+
+    def send(self, line: str):
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line: str) -> bool:
+        """Answer one command line; return False once the engine should exit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == "quit":
+            self.stop()
+            self.close()
+            return False
+        handlers = {
+            "uci": self._uci,
+            "isready": lambda _: self.send("readyok"),
+            "setoption": self._set_option,
+            "ucinewgame": self._new_game,
+            "position": self._position,
+            "go": self._go,
+            "stop": lambda _: self.stop(),
+        }
+        handler = handlers.get(command)
+        try:
+            if handler is None:
+                raise ProtocolError(f"unknown command {command!r}")
+            handler(arguments)
+        except (ProtocolError, ValueError) as error:
+            self.send(f"info string error: {error}")
+            if command == "go":
+                # Every "go" is answered, so the front-end never waits forever.
+                self.send("bestmove none")
+        return True
+
+    def _uci(self, _):
+        self.send(f"id name {ENGINE_NAME}")
+        self.send(f"id author {ENGINE_AUTHOR}")
+        options = {name: str(value).lower() if isinstance(value, bool) else value
+                   for name, value in self.options.items()}
+        for description in OPTION_DESCRIPTIONS:
+            self.send(description.format(**options))
+        self.send("uciok")
+
+    def _set_option(self, arguments: List[str]):
+        if len(arguments) < 2 or arguments[0] != "name":
+            raise ProtocolError("expected setoption name <name> [value <value>]")
+        if "value" in arguments:
+            split = arguments.index("value")
+            name, value = " ".join(arguments[1:split]), " ".join(arguments[split + 1:])
+        else:
+            name, value = " ".join(arguments[1:]), ""
+        if name not in DEFAULT_OPTIONS:
+            raise ProtocolError(f"unknown option {name!r}")
+        default = DEFAULT_OPTIONS[name]
+        if isinstance(default, bool):
+            parsed = value.lower() == "true"
+        elif isinstance(default, int):
+            parsed = int(value)
+        else:
+            parsed = value
+        if name == "Engine" and parsed not in ENGINES:
+            raise ProtocolError(f"Engine must be one of {ENGINES}")
+        self._require_idle()
+        self.options[name] = parsed
+        # The game is rebuilt with the new options by the next "go".
+        self.close()
+
+    def _new_game(self, _):
+        self._require_idle()
+        self.close()
+
+    def _position(self, arguments: List[str]):
+        self._require_idle()
+        board_size, win_length, key, to_move = 3, None, 0, None
+        moves: List[str] = []
+        index = 0
+        while index < len(arguments):
+            name = arguments[index]
+            if name == "moves":
+                moves = arguments[index + 1:]
+                break
+            if index + 1 >= len(arguments):
+                raise ProtocolError(f"missing value for {name!r}")
+            value = arguments[index + 1]
+            if name == "size":
+                board_size = int(value)
+            elif name == "win":
+                win_length = int(value)
+            elif name == "key":
+                key = int(value)
+            elif name == "tomove":
+                to_move = value.upper()
+                if to_move not in ("X", "O"):
+                    raise ProtocolError("tomove must be x or o")
+            else:
+                raise ProtocolError(f"unknown position field {name!r}")
+            index += 2
+        win_length = win_length or board_size
+        if not 2 <= win_length <= board_size:
+            raise ProtocolError(f"win must be between 2 and {board_size}")
+        cells = decode(key, board_size * board_size)
+        if to_move is None:
+            to_move = "O" if cells.count("X") > cells.count("O") else "X"
+        for name in moves:
+            cell = parse_cell_name(name, board_size)
+            if cells[cell]:
+                raise ProtocolError(f"{name} is not empty")
+            cells[cell] = to_move
+            to_move = "O" if to_move == "X" else "X"
+        self._board_size, self._win_length = board_size, win_length
+        self._cells, self._to_move = cells, to_move
+
+    def _go(self, arguments: List[str]):
+        self._require_idle()
+        limits = {"movetime": None, "nodes": None, "depth": None}
+        infinite = False
+        index = 0
+        while index < len(arguments):
+            name = arguments[index]
+            if name == "infinite":
+                infinite = True
+                index += 1
+                continue
+            if name not in limits or index + 1 >= len(arguments):
+                raise ProtocolError(f"unknown or incomplete go field {name!r}")
+            limits[name] = int(arguments[index + 1])
+            index += 2
+
+        game = self._prepare_game()
+        game._set_cells(self._cells if self._to_move == "O"
+                        else _swap_labels(self._cells))
+        if game.has_winner() or game.is_tied():
+            self.send("bestmove none")
+            return
+        if infinite:
+            # An endless budget makes the search deepen one ply at a time.
+            game.time_budget, game.node_budget = float("inf"), None
+        else:
+            game.time_budget = (limits["movetime"] / 1000
+                                if limits["movetime"] is not None else None)
+            game.node_budget = limits["nodes"]
+        game.max_depth = limits["depth"] or (
+            LARGE_BOARD_DEPTH if self._board_size > LARGE_BOARD_SIZE
+            and self.options["Engine"] != "auto" else None)
+        game.resume_search()
+        self._infinite = infinite
+        self._stopped.clear()
+        fallback = game._order_moves(list(game._available_moves()), "O")[0]
+        thread = threading.Thread(target=self._search, args=(game, fallback),
+                                  daemon=True)
+        try:
+            thread.start()
+        except RuntimeError as error:
+            raise ProtocolError(f"cannot start the search: {error}")
+        self._search_thread = thread
+
+    def _prepare_game(self) -> TicTacToeGame:
+        game = self.game
+        if (game is None or game.board_size != self._board_size
+                or game.win_length != self._win_length):
+            self.close()
+            options = self.options
+            game = self.game = TicTacToeGame(
+                board_size=self._board_size, win_length=self._win_length,
+                engine=options["Engine"], tt_size=options["Hash"],
+                use_perfect_play=options["PerfectPlay"],
+                workers=options["Workers"], shared_cache=options["Cache"] or None)
+        return game
+
+    def _search(self, game: TicTacToeGame, fallback):
+        """Search in the background thread; always ends with a bestmove line.
+
+        A search that fails, for example with MemoryError, answers with
+        an error line and "bestmove none".
+        """
+        started = time.perf_counter()
+        move = None
+        try:
+            move = game._process_computer_move()
+        except SearchCancelled:
+            move = game.last_iteration_move or fallback
+        except Exception as error:
+            self.send(f"info string error: search failed: {error!r}")
+        finally:
+            if self._infinite:
+                self._stopped.wait()
+            elapsed = round((time.perf_counter() - started) * 1000)
+            self.send(f"info nodes {game._nodes} time {elapsed}")
+            name = ("none" if move is None else
+                    cell_name(move.row * game.board_size + move.col, game.board_size))
+            self.send(f"bestmove {name}")
+
+    def _require_idle(self):
+        """Wait for a running search to finish; commands that change the game come after it."""
+        if self._search_thread is not None:
+            if self._infinite:
+                raise ProtocolError("an infinite search is running; send stop first")
+            self._search_thread.join()
+            self._search_thread = None
+
+    def stop(self):
+        """Stop the running search, if any, and wait for its bestmove."""
+        if self._search_thread is not None:
+            if self._search_thread.is_alive():
+                self.game.cancel_search()
+            self._stopped.set()
+            self._search_thread.join()
+            self._search_thread = None
+            self._infinite = False
+
+    def close(self):
+        if self.game is not None:
+            self.game.close()
+            self.game = None
+
+
+def _limit_resources(cpus: Optional[str], memory_limit: Optional[int]):
+    """Pin the process to cpus ("0,2") and cap its address space at memory_limit MB."""
+    if cpus:
+        if not hasattr(os, "sched_setaffinity"):
+            raise SystemExit("--cpus is not supported on this platform")
+        os.sched_setaffinity(0, {int(cpu) for cpu in cpus.split(",")})
+    if memory_limit:
+        try:
+            import resource
+        except ImportError:
+            raise SystemExit("--memory-limit is not supported on this platform")
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the engine over stdin/stdout.")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_OPTIONS["Engine"])
+    parser.add_argument("--hash", type=int, default=DEFAULT_OPTIONS["Hash"],
+                        help="transposition table entries")
+    parser.add_argument("--cache", default=DEFAULT_OPTIONS["Cache"],
+                        help="file of a search cache shared with other processes")
+    parser.add_argument("--workers", type=int, default=DEFAULT_OPTIONS["Workers"])
+    parser.add_argument("--no-perfect-play", action="store_true",
+                        help="always search, even where a table has the answer")
+    parser.add_argument("--cpus", default=None,
+                        help="comma-separated CPUs the engine may run on")
+    parser.add_argument("--memory-limit", type=int, default=None,
+                        help="address space limit in megabytes")
+    args = parser.parse_args(argv)
+    _limit_resources(args.cpus, args.memory_limit)
+    protocol = EngineProtocol(sys.stdout, {
+        "Engine": args.engine,
+        "Hash": args.hash,
+        "Cache": args.cache,
+        "Workers": args.workers,
+        "PerfectPlay": not args.no_perfect_play,
+    })
+    try:
+        for line in sys.stdin:
+            if not protocol.handle(line):
+                break
+    finally:
+        protocol.stop()
+        protocol.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Runs an engine process that speaks engine.py's protocol.
+
+``EngineClient`` starts the process, performs the handshake and asks it
+for moves. Output is read by a background thread, so a search can be
+stopped while the caller waits for its answer:
+
+    client = EngineClient([sys.executable, "engine.py", "--engine", "mcts"])
+    cell = client.best_move(4, 3, game.encode_position(), "O", movetime=1.0)
+    client.close()
+"""
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from encoding import parse_cell_name
+
+HANDSHAKE_TIMEOUT = 10.0
+QUIT_TIMEOUT = 2.0
+STOP_TIMEOUT = 3.0
+POLL_INTERVAL = 0.05
+
+
+class EngineError(Exception):
+    """Raised when the engine process exits or answers something unexpected."""
+
+
+class EngineClient:
+    """One engine process and the lines it has written so far."""
+
+    def __init__(self, command: Sequence[str], timeout: float = HANDSHAKE_TIMEOUT):
+        self.command = list(command)
+        self.name = None
+        self.last_info: List[str] = []
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        try:
+            self._process = subprocess.Popen(
+                self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                universal_newlines=True, bufsize=1)
+        except OSError as error:
+            raise EngineError(f"cannot start {self.command}: {error}")
+        self._reader = threading.Thread(target=self._read_lines, daemon=True)
+        self._reader.start()
+        self.send("uci")
+        for line in self._lines_until("uciok", timeout):
+            if line.startswith("id name "):
+                self.name = line[len("id name "):]
+
+    def _read_lines(self):
+        for line in self._process.stdout:
+            self._lines.put(line.rstrip("\n"))
+        self._lines.put(None)
+
+    def _next_line(self, timeout: Optional[float]) -> Optional[str]:
+        """Return the next line, or None if none arrived within timeout."""
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if line is None:
+            self._lines.put(None)
+            raise EngineError(f"engine exited with status {self._process.wait()}")
+        return line
+
+    def _lines_until(self, last: str, timeout: float) -> List[str]:
+        lines = []
+        while True:
+            line = self._next_line(timeout)
+            if line is None:
+                raise EngineError(f"engine did not answer {last!r} in {timeout}s")
+            if line == last:
+                return lines
+            lines.append(line)
+
+    def send(self, line: str):
+        try:
+            self._process.stdin.write(line + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as error:
+            raise EngineError(f"engine is not running: {error}")
+
+    def is_running(self) -> bool:
+        return self._process.poll() is None
+
+    def set_option(self, name: str, value):
+        self.send(f"setoption name {name} value {value}")
+
+    def best_move(self, board_size: int, win_length: int, key: int, to_move: str,
+                  movetime: Optional[float] = None, nodes: Optional[int] = None,
+                  depth: Optional[int] = None,
+                  is_cancelled: Callable[[], bool] = lambda: False) -> Optional[int]:
+        """Return the engine's move for to_move as a cell index.
+
+        movetime is in seconds. Returns None if is_cancelled() became true
+        during the search, after the engine has answered the stop. Raises
+        EngineError if the engine reports an error, or does not answer
+        the stop within STOP_TIMEOUT seconds; it is closed in that case.
+        """
+        self.send(f"position size {board_size} win {win_length} key {key} "
+                  f"tomove {to_move.lower()}")
+        limits = []
+        if movetime is not None:
+            limits.append(f"movetime {max(round(movetime * 1000), 1)}")
+        if nodes is not None:
+            limits.append(f"nodes {nodes}")
+        if depth is not None:
+            limits.append(f"depth {depth}")
+        self.send(" ".join(["go"] + limits))
+        stop_deadline = None
+        error = None
+        self.last_info = []
+        while True:
+            if stop_deadline is None and is_cancelled():
+                self.send("stop")
+                stop_deadline = time.monotonic() + STOP_TIMEOUT
+            if stop_deadline is not None and time.monotonic() > stop_deadline:
+                self.close()
+                raise EngineError(f"engine did not answer stop in {STOP_TIMEOUT}s")
+            line = self._next_line(POLL_INTERVAL)
+            if line is None:
+                continue
+            if line.startswith("info string error"):
+                # Read on to the bestmove, so it is not taken for the next answer.
+                error = error or line[len("info string "):]
+                continue
+            if line.startswith("info "):
+                self.last_info.append(line)
+                continue
+            if line.startswith("bestmove"):
+                if error is not None:
+                    raise EngineError(error)
+                if stop_deadline is not None:
+                    return None
+                name = line.split()[1] if len(line.split()) > 1 else "none"
+                if name == "none":
+                    raise EngineError("engine found no move")
+                return parse_cell_name(name, board_size)
+
+    def close(self):
+        """Ask the engine to quit and kill it if it does not."""
+        if self.is_running():
+            try:
+                self.send("quit")
+                self._process.stdin.close()
+            except (EngineError, OSError):
+                pass
+            try:
+                self._process.wait(QUIT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        self._process.stdout.close()
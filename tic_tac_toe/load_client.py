@@ -0,0 +1,137 @@
+"""Load generator for server.py.
+
+Opens many connections that each play complete games with random moves,
+then reports throughput and move latency percentiles:
+
+    python server.py --port 8765 &
+    python load_client.py --port 8765 --clients 500 --games 4
+
+With --serve the server runs in the same process on a free port, which is
+handy for quick local measurements.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+from benchmark import percentile
+from server import DEFAULT_HOST, DEFAULT_PORT, GameServer
+
+
+class LoadStats:
+    """Latencies and counters collected by every client."""
+
+    def __init__(self):
+        self.move_times: List[float] = []
+        self.games = 0
+        self.errors = 0
+        self.outcomes = {}
+
+    def report(self, elapsed: float, clients: int) -> dict:
+        return {
+            "clients": clients,
+            "games": self.games,
+            "moves": len(self.move_times),
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "games_per_sec": round(self.games / elapsed, 1) if elapsed else 0.0,
+            "moves_per_sec": round(len(self.move_times) / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": {
+                name: round(percentile(self.move_times, fraction) * 1000, 3)
+                for name, fraction in (("p50", 0.5), ("p90", 0.9),
+                                       ("p99", 0.99), ("max", 1.0))
+            },
+            "outcomes": dict(sorted(self.outcomes.items())),
+        }
+
+
+async def _request(reader, writer, request: dict) -> dict:
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def run_client(host: str, port: int, games: int, options: dict,
+                     stats: LoadStats, seed: int):
+    """Play games one after another over a single connection."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for number in range(games):
+            request = dict(options, op="new", computer_first=bool(number % 2))
+            started = time.perf_counter()
+            state = await _request(reader, writer, request)
+            if not state["ok"]:
+                stats.errors += 1
+                continue
+            if request["computer_first"]:
+                stats.move_times.append(time.perf_counter() - started)
+            while state["ok"] and state["result"] is None:
+                board = state["board"].replace("/", "")
+                size = int(len(board) ** 0.5)
+                row, col = divmod(rng.choice(
+                    [index for index, label in enumerate(board) if label == "."]), size)
+                started = time.perf_counter()
+                state = await _request(reader, writer, {
+                    "op": "move", "session": state["session"], "row": row, "col": col})
+                stats.move_times.append(time.perf_counter() - started)
+            if not state["ok"]:
+                stats.errors += 1
+                continue
+            stats.games += 1
+            stats.outcomes[state["result"]] = stats.outcomes.get(state["result"], 0) + 1
+            await _request(reader, writer, {"op": "close", "session": state["session"]})
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, clients: int, games: int, options: dict,
+                   seed: int = 0, serve: bool = False) -> dict:
+    server = None
+    if serve:
+        server = GameServer(max_sessions=max(clients, 1))
+        await server.start(host, 0)
+        port = server.port
+    stats = LoadStats()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            run_client(host, port, games, options, stats, seed + client)
+            for client in range(clients)
+        ])
+    finally:
+        if server is not None:
+            await server.close()
+    return stats.report(time.perf_counter() - started, clients)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load against server.py.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--serve", action="store_true",
+                        help="run the server in this process on a free port")
+    parser.add_argument("--clients", type=int, default=100,
+                        help="concurrent connections, one session each at a time")
+    parser.add_argument("--games", type=int, default=4, help="games per client")
+    parser.add_argument("--board-size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--engine", default="minimax")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    options = {"board_size": args.board_size, "engine": args.engine}
+    if args.win_length is not None:
+        options["win_length"] = args.win_length
+    if args.max_depth is not None:
+        options["max_depth"] = args.max_depth
+
+    report = asyncio.run(run_load(args.host, args.port, args.clients, args.games,
+                                  options, args.seed, args.serve))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,29 @@
 """A tic-tac-toe game built with Python and Tkinter."""
+import argparse
 from itertools import cycle
+import queue
+import shlex
+import threading
+import time
 import tkinter as tk
 from tkinter import font
-from typing import List, NamedTuple
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from bitboard import BitBoard
+from dispatch import AUTO_LATENCY, AUTO_MIN_DEPTH, choose_engine
+from encoding import decode, encode, to_masks
+from engine_client import EngineClient, EngineError
+from evaluation import CELL_CODES, LineEvaluator
+from mcts import MCTSEngine
+from parallel import ParallelRootSearch
+from perfect_play import TABLE_BOARD_SIZE, load_table
+from shared_cache import open_cache
+from tablebase import OUTCOME_NAMES, load_tablebase
+from tracing import SearchStats
+from transposition import (DEFAULT_TT_SIZE, EXACT, LOWER_BOUND, UPPER_BOUND,
+                           TranspositionTable, ZobristHasher)
 
 
 class Player(NamedTuple):
@@ -18,20 +39,128 @@ class Move(NamedTuple):
     label: str = ""
 
 
+class CellState(NamedTuple):
+    """What the window shows in one cell; background None is the default."""
+    label: str = ""
+    color: str = "black"
+    background: Optional[str] = None
+    highlighted: bool = False
+
+
+class MoveAnalysis(NamedTuple):
+    """The exact score of one legal move and the line of best play after it.
+
+    score is from the point of view of the player who moves, so larger is
+    better for them; pv starts with move itself.
+    """
+    move: Move
+    score: int
+    pv: List[Move]
+
+
 BOARD_SIZE = 3
+LARGE_BOARD_SIZE = 4
+LARGE_BOARD_DEPTH = 2
+ENGINES = ("minimax", "bitboard", "mcts", "auto")
+MOVE_ORDERINGS = ("static", "killers", "history")
+LARGE_BOARD_TIME_BUDGET = 3.0
+PERFECT_PLAY_TABLE = load_table()
+
+
+SEARCH_POLL_MS = 50
+RENDERERS = ("buttons", "canvas")
+CANVAS_BOARD_PIXELS = 640
+CANVAS_MIN_CELL_PIXELS = 24
+CANVAS_MAX_CELL_PIXELS = 120
+HEAT_MAP_WIN = "#7bd17b"
+HEAT_MAP_LOSS = "#e67a7a"
+HEAT_MAP_EVEN = (0xf2, 0xd8, 0x6b)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the move's time or node budget runs out."""
+
+
+class SearchCancelled(Exception):
+    """Raised inside the search after cancel_search() was called."""
 
 
 class TicTacToeGame:
-    def __init__(self, board_size=BOARD_SIZE, is_debug=False, is_human=True):
+    def __init__(self, board_size=BOARD_SIZE, is_debug=False, is_human=True,
+                 engine="minimax", tt_size=DEFAULT_TT_SIZE,
+                 use_perfect_play=True, win_length=None, max_depth=None,
+                 time_budget=None, node_budget=None,
+                 move_ordering=MOVE_ORDERINGS, workers=1, trace=False,
+                 mcts_options=None, shared_cache=None, ponder=False,
+                 engine_command=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+        if engine == "bitboard" and board_size > LARGE_BOARD_SIZE:
+            # The bitboard search ignores max_depth and the budgets.
+            raise ValueError(f"The bitboard engine only plays boards up to "
+                             f"{LARGE_BOARD_SIZE}x{LARGE_BOARD_SIZE}")
+        win_length = win_length or board_size
+        if not 2 <= win_length <= board_size:
+            raise ValueError(
+                f"win_length must be between 2 and {board_size}, got {win_length}")
+        if max_depth is not None and max_depth < 1:
+            raise ValueError(f"max_depth must be at least 1, got {max_depth}")
+        unknown_orderings = set(move_ordering) - set(MOVE_ORDERINGS)
+        if unknown_orderings:
+            raise ValueError(f"Unknown move ordering {sorted(unknown_orderings)}, "
+                             f"expected some of {MOVE_ORDERINGS}")
         self.score_table = {}
+        self._win_scores = {}
         self._default_players = (Player(label="X", color="blue", score=-10),
                                  Player(label="O", color="green", score=10, is_human=False))
         self.board_size = board_size
+        self.win_length = win_length
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self._depth_limit = max_depth
+        self._deadline = None
+        self._stop_requested = False
+        self._nodes = 0
+        self.nodes_searched = 0
+        self.move_ordering = tuple(move_ordering)
+        self.workers = workers
+        self.ponder = ponder
+        self._parallel = None
+        self._search_stats = SearchStats() if trace else None
+        # The counters the running search updates; None while pondering.
+        self._stats = self._search_stats
+        self._mcts_options = dict(mcts_options or {})
+        self._mcts = None
+        self.last_engine_choice = None
+        self.last_iteration_move = None
+        self.engine_command = list(engine_command) if engine_command else None
+        self._engine_client = None
+        self._static_priority = []
+        self._killers = []
+        self._history = {}
         self.winner_combo = []
-        self._current_moves = []
+        self._cells = []
+        self._cell_moves = []
+        self._move_stack = []
+        self._redo_moves = []
         self._has_winner = False
         self._winning_combos = []
+        self._cell_lines = []
+        self._line_counts = {}
+        self._combo_length = 0
+        self._cell_count = 0
+        self._move_count = 0
         self._is_debug = is_debug
+        self.engine = engine
+        self._use_perfect_play = use_perfect_play
+        self._tablebase = (load_tablebase(board_size, win_length)
+                           if use_perfect_play else None)
+        self._transposition_table = TranspositionTable(tt_size) if tt_size else None
+        self.shared_cache_path = shared_cache
+        self._shared_cache = (open_cache(shared_cache, board_size, win_length)
+                              if shared_cache else None)
+        self._hashes = []
         self.set_players(is_human=is_human)
         self._setup_board()
         self._setup_score_table(self._default_players)
@@ -45,117 +174,743 @@ class TicTacToeGame:
             self.current_player = next(self._players)
 
     def _setup_board(self):
-        self._current_moves = [
-            [Move(row, col) for col in range(self.board_size)]
-            for row in range(self.board_size)
-        ]
+        self._cell_count = self.board_size ** 2
+        # The position is one label per cell in row-major order; searches
+        # update it in place and record the cells they fill on _move_stack.
+        self._cells = [""] * self._cell_count
+        self._cell_moves = [Move(*divmod(index, self.board_size))
+                            for index in range(self._cell_count)]
+        self._move_stack = [0] * self._cell_count
+        self._redo_moves = []
         self._winning_combos = self._get_winning_combos()
+        self._combo_length = len(self._winning_combos[0])
+        self._cell_lines = [[] for _ in range(self.board_size ** 2)]
+        for line, combo in enumerate(self._winning_combos):
+            for row, col in combo:
+                self._cell_lines[row * self.board_size + col].append(line)
+        self._hasher = ZobristHasher(self.board_size)
+        self._evaluator = LineEvaluator(
+            self.board_size, self._winning_combos, self.win_length)
+        # Cells on more winning lines come first: the center, then the
+        # corners on the classic board.
+        self._static_priority = [len(lines) for lines in self._cell_lines]
+        self._killers = [[] for _ in range(self._cell_count + 1)]
+        self._reset_counters()
+        self._reset_history()
+
+    def _reset_counters(self):
+        """Rebuild the move stack, per-line counters and hashes from the board.
+
+        The order in which the pieces were played is not known, so the
+        stack lists them in row-major order.
+        """
+        self._line_counts = {
+            label: [0] * len(self._winning_combos) for label in ("X", "O")
+        }
+        self._hashes = self._hasher.hashes(self._current_moves)
+        self._move_count = 0
+        for index, label in enumerate(self._cells):
+            if label:
+                self._move_stack[self._move_count] = index
+                self._move_count += 1
+                counts = self._line_counts[label]
+                for line in self._cell_lines[index]:
+                    counts[line] += 1
+
+    def _reset_history(self):
+        self._history = {label: [0] * self._cell_count for label in ("X", "O")}
 
     def _setup_score_table(self, players: List[Player]):
         self.score_table = {player.label: player.score for player in players}
+        # Win scores are scaled so that a win at any depth outranks every
+        # heuristic evaluation of a non-terminal position.
+        floor = self._evaluator.bound + self._cell_count + 1
+        smallest = min(abs(score) for score in self.score_table.values())
+        scale = -(-floor // smallest)
+        self._win_scores = {
+            label: score * scale for label, score in self.score_table.items()
+        }
 
     def _get_winning_combos(self):
-        rows = [
-            [(move.row, move.col) for move in row]
-            for row in self._current_moves
+        """Return every run of win_length cells along a row, column or diagonal."""
+        size, length = self.board_size, self.win_length
+        combos = []
+        for row_step, col_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for row in range(size):
+                for col in range(size):
+                    last_row = row + row_step * (length - 1)
+                    last_col = col + col_step * (length - 1)
+                    if 0 <= last_row < size and 0 <= last_col < size:
+                        combos.append([
+                            (row + row_step * i, col + col_step * i)
+                            for i in range(length)
+                        ])
+        return combos
+
+    @property
+    def _current_moves(self) -> List[List[Move]]:
+        """Return the position as rows of Moves, built fresh from the cells."""
+        size = self.board_size
+        return [
+            [Move(row, col, self._cells[row * size + col]) for col in range(size)]
+            for row in range(size)
         ]
-        columns = [list(col) for col in zip(*rows)]
-        first_diagonal = [row[i] for i, row in enumerate(rows)]
-        second_diagonal = [col[j] for j, col in enumerate(reversed(columns))]
-        return rows + columns + [first_diagonal, second_diagonal]
 
     def is_valid_move(self, move: Move):
         """Return True if move is valid, and False otherwise."""
-        row, col = move.row, move.col
-        move_was_not_played = self._current_moves[row][col].label == ""
+        move_was_not_played = self._cells[move.row * self.board_size + move.col] == ""
         no_winner = not self._has_winner
         return no_winner and move_was_not_played
 
     def process_move(self, move: Move):
         """Process the current move and check if it's a win."""
-        row, col = move.row, move.col
-        self._current_moves[row][col] = move
-        combo = self._check_winning()
+        self._redo_moves.clear()
+        self._play(move.row, move.col, move.label)
+
+    def _play(self, row, col, label):
+        combo = self._make_move(row, col, label)
         if combo:
             self._has_winner = True
             self.winner_combo = combo
 
+    def _make_move(self, row, col, label):
+        """Place label on (row, col) and return the combo it completes, if any.
+
+        The cell is pushed on the move stack; _unmake_move() takes it back.
+        Nothing is allocated apart from the new hash values.
+        """
+        index = row * self.board_size + col
+        self._cells[index] = label
+        self._hasher.toggle(self._hashes, index, label)
+        self._move_stack[self._move_count] = index
+        self._move_count += 1
+        counts = self._line_counts[label]
+        combo = None
+        for line in self._cell_lines[index]:
+            counts[line] += 1
+            if counts[line] == self._combo_length:
+                combo = self._winning_combos[line]
+        return combo
+
+    def _unmake_move(self):
+        """Take back the last move on the move stack and return its cell index."""
+        self._move_count -= 1
+        index = self._move_stack[self._move_count]
+        label = self._cells[index]
+        self._cells[index] = ""
+        self._hasher.toggle(self._hashes, index, label)
+        counts = self._line_counts[label]
+        for line in self._cell_lines[index]:
+            counts[line] -= 1
+        return index
+
+    def undo_move(self):
+        """Take back the last move of the game and return it, or None.
+
+        The player whose move was taken back is to move again.
+        """
+        if not self._move_count:
+            return None
+        label = self._cells[self._move_stack[self._move_count - 1]]
+        row, col = divmod(self._unmake_move(), self.board_size)
+        move = Move(row, col, label)
+        self._redo_moves.append(move)
+        self._has_winner = False
+        self.winner_combo = []
+        self._set_current_player(label)
+        return move
+
+    def redo_move(self):
+        """Replay the last move taken back by undo_move() and return it, or None."""
+        if not self._redo_moves or self._has_winner:
+            return None
+        move = self._redo_moves.pop()
+        self._play(move.row, move.col, move.label)
+        if self._has_winner or self.is_tied():
+            self._set_current_player(move.label)
+        else:
+            self._set_current_player("O" if move.label == "X" else "X")
+        return move
+
+    def can_undo(self):
+        return self._move_count > 0
+
+    def can_redo(self):
+        return bool(self._redo_moves) and not self._has_winner
+
+    def _set_current_player(self, label):
+        while self.current_player.label != label:
+            self.toggle_player()
+
     def _process_computer_move(self):
-        bestScore = float('-inf')
+        started = time.perf_counter()
+        self._nodes = 0
+        self.last_engine_choice = None
+        self.last_iteration_move = None
         bestMove = None
-        for row in self._current_moves:
-            for move in row:
-                if move.label == '':
-                    self._current_moves[move.row][move.col] = Move(
-                        move.row, move.col, 'O')
-                    self.logger(f'PARENT -> x: {move.row}, y: {move.col}')
-                    score = self._minimax()
-                    self._current_moves[move.row][move.col] = Move(
-                        move.row, move.col, '')
-                    if score > bestScore:
-                        bestScore = score
-                        bestMove = move
-
-        self._current_moves[bestMove.row][bestMove.col] = Move(
-            bestMove.row, bestMove.col, 'O')
-        combo = self._check_winning()
-        if combo:
-            self._has_winner = True
-            self.winner_combo = combo
+        if self.engine_command is not None:
+            try:
+                bestMove = self._external_move()
+            except EngineError as error:
+                self.logger(f'EXTERNAL -> failed: {error}, searching in this process')
+        if bestMove is None:
+            bestMove = self._perfect_play_move() or self._tablebase_move()
+        if bestMove is None:
+            if self.engine == "auto":
+                bestMove = self._auto_move()
+            elif self.engine == "bitboard":
+                bestMove, _ = self._bitboard_move()
+            elif self.engine == "mcts":
+                bestMove, _ = self._mcts_move()
+            else:
+                bestMove, _ = self._minimax_move()
+
+        self._redo_moves.clear()
+        self._play(bestMove.row, bestMove.col, 'O')
+        if self._stats is not None:
+            self._stats.record_move(self._nodes, time.perf_counter() - started)
         return bestMove
 
-    def _minimax(self, depth=0, alpha=float('-inf'), beta=float('inf'), is_maximizing=False):
-        if self._check_winning(self._current_moves):
-            if is_maximizing:
-                temp = self.score_table['X'] + depth
-                self.logger(
-                    f'Depth: {depth}, score: {temp}, isMaximizing: {is_maximizing}')
-                return self.score_table['X'] + depth
+    def _bitboard_move(self):
+        board = BitBoard(self.board_size, self._winning_combos)
+        board.x_mask, board.o_mask = to_masks(self._cells)
+        index, score = board.best_move(self._win_scores,
+                                       lambda: self._stop_requested)
+        if index is None:
+            raise SearchCancelled
+        row, col = board.cell_position(index)
+        self.logger(f'BITBOARD -> x: {row}, y: {col}, score: {score}')
+        return Move(row, col), score
+
+    def _auto_move(self):
+        """Return the move of the engine choose_engine() picks for this position; see dispatch.py.
+
+        time_budget is the latency target and max_depth the plies a
+        depth-limited search must reach to be preferred over MCTS.
+        """
+        choice = self.last_engine_choice = choose_engine(
+            self.board_size, self.win_length, self._cell_count - self._move_count,
+            latency=self.time_budget or AUTO_LATENCY,
+            min_depth=self.max_depth or AUTO_MIN_DEPTH)
+        self.logger(f'AUTO -> engine: {choice.engine}, strategy: {choice.strategy}, '
+                    f'depth: {choice.max_depth or "-"}, estimated nodes: {choice.nodes:.0f}, '
+                    f'estimated seconds: {choice.seconds:.3f}')
+        max_depth, time_budget = self.max_depth, self.time_budget
+        self.max_depth, self.time_budget = choice.max_depth, choice.time_budget
+        started = time.perf_counter()
+        try:
+            if choice.engine == "mcts":
+                bestMove, _ = self._mcts_move()
+            else:
+                bestMove, _ = self._minimax_move()
+        finally:
+            self.max_depth, self.time_budget = max_depth, time_budget
+        self.logger(f'AUTO -> spent nodes: {self._nodes}, '
+                    f'seconds: {time.perf_counter() - started:.3f}')
+        return bestMove
+
+    def _mcts_move(self):
+        """Return the most visited move of a Monte Carlo tree search; see mcts.py."""
+        options = {"time_budget": self.time_budget, **self._mcts_options}
+        if self._mcts is None:
+            self._mcts = MCTSEngine(self, **options)
+        self._mcts.time_budget = options["time_budget"]
+        index, win_rate = self._mcts.search(lambda: self._stop_requested)
+        if index is None:
+            raise SearchCancelled
+        self._nodes = self._mcts.playouts_run
+        row, col = divmod(index, self.board_size)
+        self.logger(f'MCTS -> x: {row}, y: {col}, win rate: {win_rate:.3f}, '
+                    f'playouts: {self._mcts.playouts_run}')
+        return Move(row, col), win_rate
+
+    def _external_move(self):
+        """Return the move of the engine process; see engine.py.
+
+        The process is started on first use and restarted, with one retry,
+        when it has exited. Raises EngineError if it still fails; the
+        caller then searches in this process.
+        """
+        for attempt in range(2):
+            client = self._engine_client
+            if client is None or not client.is_running():
+                if client is not None:
+                    client.close()
+                client = self._engine_client = EngineClient(self.engine_command)
+            try:
+                index = client.best_move(
+                    self.board_size, self.win_length, self.encode_position(), 'O',
+                    movetime=self.time_budget, nodes=self.node_budget,
+                    depth=self.max_depth, is_cancelled=lambda: self._stop_requested)
+                break
+            except EngineError:
+                if self._stop_requested:
+                    raise SearchCancelled
+                if attempt or client.is_running():
+                    raise
+        if index is None:
+            raise SearchCancelled
+        row, col = divmod(index, self.board_size)
+        self.logger(f'EXTERNAL -> x: {row}, y: {col}, engine: {client.name}, '
+                    f'{" ".join(client.last_info)}')
+        return Move(row, col)
+
+    def _perfect_play_move(self):
+        if (not self._use_perfect_play or self.board_size != TABLE_BOARD_SIZE
+                or self.win_length != TABLE_BOARD_SIZE):
+            return None
+        entry = PERFECT_PLAY_TABLE.get(self.encode_position())
+        if entry is None:
+            return None
+        score, row, col = entry
+        self.logger(f'PERFECT_PLAY -> x: {row}, y: {col}, score: {score}')
+        return Move(row, col)
+
+    def _tablebase_move(self):
+        """Return the tablebase move for "O", if a tablebase was generated; see tablebase.py."""
+        if self._tablebase is None:
+            return None
+        entry = self._tablebase.best_move(self.encode_position(), self._cells, 'O')
+        if entry is None:
+            return None
+        index, outcome, distance = entry
+        row, col = divmod(index, self.board_size)
+        self.logger(f'TABLEBASE -> x: {row}, y: {col}, '
+                    f'{OUTCOME_NAMES[outcome]} in {distance}')
+        return Move(row, col)
+
+    def _minimax_move(self):
+        """Return the best move for "O" and its score.
+
+        Without a time or node budget the position is searched once, to the
+        end of the game or to max_depth. With a budget the search deepens
+        one ply at a time, trying the previous iteration's best move first,
+        and returns the result of the last iteration that finished.
+        """
+        self._nodes = 0
+        self._deadline = None
+        self._killers = [[] for _ in range(self._cell_count + 1)]
+        self.last_iteration_move = None
+        moves = self._order_moves(list(self._available_moves()), 'O')
+        if self.time_budget is None and self.node_budget is None:
+            self._depth_limit = self.max_depth
+            if self.workers > 1:
+                result = self._parallel_root_search(moves)
             else:
-                temp = self.score_table['O'] - depth
-                self.logger(
-                    f'Depth: {depth}, score: {temp}, isMaximizing: {is_maximizing}')
-                return self.score_table['O'] - depth
-        elif self.is_tied(self._current_moves):
-            self.logger(
-                f'Depth: {depth}, score: {0}, Tied')
+                result = self._search_root(moves)
+            self._report_nodes()
+            return result
+
+        if self.time_budget is not None:
+            self._deadline = time.perf_counter() + self.time_budget
+        empty_cells = self._cell_count - self._move_count
+        last_depth = min(self.max_depth or empty_cells, empty_cells)
+        bestMove, bestScore = moves[0], None
+        try:
+            for depth_limit in range(1, last_depth + 1):
+                self._depth_limit = depth_limit
+                try:
+                    bestMove, bestScore = self._search_root(moves)
+                except SearchTimeout:
+                    self.logger(f'TIMEOUT -> depth: {depth_limit}, nodes: {self._nodes}')
+                    break
+                self.last_iteration_move = bestMove
+                self.logger(f'ITERATION -> depth: {depth_limit}, '
+                            f'x: {bestMove.row}, y: {bestMove.col}, score: {bestScore}')
+                moves.remove(bestMove)
+                moves.insert(0, bestMove)
+                if abs(bestScore) > self._evaluator.bound:
+                    break
+        finally:
+            self._depth_limit = self.max_depth
+            self._deadline = None
+        self._report_nodes()
+        return bestMove, bestScore
+
+    def _parallel_root_search(self, moves):
+        """Search the root moves in worker processes; see parallel.py."""
+        bestMove, bestScore, self._nodes = self._parallel_search().search(
+            self.encode_position(), moves, lambda: self._stop_requested,
+            self._depth_limit)
+        if bestMove is None:
+            raise SearchCancelled
+        return bestMove, bestScore
+
+    def _parallel_search(self):
+        if self._parallel is None:
+            table = self._transposition_table
+            config = {
+                "board_size": self.board_size,
+                "win_length": self.win_length,
+                "max_depth": self.max_depth,
+                "tt_size": table.capacity if table is not None else 0,
+                "move_ordering": self.move_ordering,
+                "shared_cache": self.shared_cache_path,
+            }
+            self._parallel = ParallelRootSearch(config, self.workers)
+        return self._parallel
+
+    def close(self):
+        """Shut down the worker processes and the engine process, if any."""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+        if self._engine_client is not None:
+            self._engine_client.close()
+            self._engine_client = None
+
+    def _report_nodes(self):
+        self.nodes_searched = self._nodes
+        self.logger(f'NODES -> {self._nodes}, ordering: {self.move_ordering}')
+
+    def _order_moves(self, moves, label, killers=()):
+        """Sort moves best-first by killer moves, history and static priority.
+
+        The sort is stable, so moves that tie keep their row-major order.
+        """
+        if not self.move_ordering:
+            return moves
+        size = self.board_size
+        if "killers" not in self.move_ordering:
+            killers = ()
+        history = self._history[label] if "history" in self.move_ordering else None
+        static = self._static_priority if "static" in self.move_ordering else None
+
+        def priority(move):
+            index = move.row * size + move.col
+            return (index in killers,
+                    history[index] if history else 0,
+                    static[index] if static else 0)
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _record_cutoff(self, move, label, depth, draft):
+        """Remember a move that refuted the node, for killers and history."""
+        index = move.row * self.board_size + move.col
+        killers = self._killers[depth]
+        if index not in killers:
+            killers.insert(0, index)
+            del killers[2:]
+        self._history[label][index] += draft * draft
+
+    def _search_root(self, moves):
+        """Search every root move in order; ties keep the earliest one."""
+        bestScore = float('-inf')
+        bestMove = None
+        for move in moves:
+            combo = self._make_move(move.row, move.col, 'O')
+            try:
+                if combo:
+                    score = self._terminal_score('O', 0)
+                else:
+                    score = self._minimax(0, bestScore, float('inf'), False)
+            finally:
+                self._unmake_move()
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+        return bestMove, bestScore
+
+    def _minimax(self, depth=0, alpha=float('-inf'), beta=float('inf'), is_maximizing=False):
+        self._nodes += 1
+        if self._stop_requested:
+            raise SearchCancelled
+        if self._deadline is not None or self.node_budget is not None:
+            self._check_budget()
+        draft = self._draft(depth)
+        table = self._transposition_table
+        shared = self._shared_cache
+        hash_move = None
+        if table is not None or shared is not None:
+            key = self._hasher.canonical(self._hashes, is_maximizing)
+            entry = table.get(key) if table is not None else None
+            if entry is None and shared is not None:
+                entry = shared.get(key)
+                if entry is not None and entry.move is not None:
+                    # Moves are cached in the orientation of the canonical key.
+                    hash_move = self._hasher.from_canonical(self._hashes, entry.move)
+                    if self._cells[hash_move]:
+                        hash_move = None
+            if entry is not None and entry.draft == draft:
+                value = self._from_table_value(entry.value, depth)
+                if entry.flag == EXACT:
+                    if self._stats is not None:
+                        self._stats.tt_hits += 1
+                    return value
+                if entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    if self._stats is not None:
+                        self._stats.tt_hits += 1
+                    return value
+
+        if self._move_count == self._cell_count:
+            if self._stats is not None:
+                self._stats.terminal_hits += 1
             return 0
+        if draft <= 0:
+            if self._stats is not None:
+                self._stats.evaluations += 1
+            return self._evaluate()
+        node_depth = depth
+        window = (alpha, beta)
         depth += 1
 
         if is_maximizing:
+            label, next_is_maximizing = 'O', False
             bestScore = float('-inf')
-            for row in self._current_moves:
-                for move in row:
-                    if move.label == '':
-                        self._current_moves[move.row][move.col] = Move(
-                            move.row, move.col, 'O')
-                        self.logger(
-                            f'IS_MAXIMAZING -> x: {move.row}, y: {move.col}')
-                        score = self._minimax(depth, alpha, beta, False)
-                        self._current_moves[move.row][move.col] = Move(
-                            move.row, move.col, '')
-                        bestScore = max(score, bestScore)
-                        alpha = max(alpha, score)
-                        if beta <= alpha:
-                            return bestScore
-            return bestScore
         else:
+            label, next_is_maximizing = 'X', True
             bestScore = float('inf')
-            for row in self._current_moves:
-                for move in row:
-                    if move.label == '':
-                        self._current_moves[move.row][move.col] = Move(
-                            move.row, move.col, 'X')
-                        self.logger(
-                            f'NOT_IS_MAXIMAZING -> x: {move.row}, y: {move.col}')
-                        score = self._minimax(depth, alpha, beta, True)
-                        self._current_moves[move.row][move.col] = Move(
-                            move.row, move.col, '')
-                        bestScore = min(score, bestScore)
-                        beta = min(beta, score)
-                        if beta <= alpha:
-                            return bestScore
-            return bestScore
+        moves = self._order_moves(
+            list(self._available_moves()), label, self._killers[node_depth])
+        if hash_move is not None:
+            move = self._cell_moves[hash_move]
+            moves.remove(move)
+            moves.insert(0, move)
+        bestMove = None
+        for move in moves:
+            combo = self._make_move(move.row, move.col, label)
+            try:
+                if combo:
+                    score = self._terminal_score(label, depth)
+                else:
+                    score = self._minimax(depth, alpha, beta, next_is_maximizing)
+            finally:
+                self._unmake_move()
+            if is_maximizing:
+                if score > bestScore:
+                    bestScore, bestMove = score, move
+                alpha = max(alpha, score)
+            else:
+                if score < bestScore:
+                    bestScore, bestMove = score, move
+                beta = min(beta, score)
+            if beta <= alpha:
+                self._record_cutoff(move, label, node_depth, draft)
+                if self._stats is not None:
+                    self._stats.cutoffs[node_depth] += 1
+                break
+
+        if table is not None or shared is not None:
+            if bestScore <= window[0]:
+                flag = UPPER_BOUND
+            elif bestScore >= window[1]:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            value = self._to_table_value(bestScore, node_depth)
+            if table is not None:
+                table.store(key, value, flag, draft)
+            if shared is not None:
+                shared.store(key, value, flag, draft, self._hasher.to_canonical(
+                    self._hashes, bestMove.row * self.board_size + bestMove.col))
+        return bestScore
+
+    def _check_budget(self):
+        if self.node_budget is not None and self._nodes > self.node_budget:
+            raise SearchTimeout
+        if (self._deadline is not None and self._nodes % 16 == 0
+                and time.perf_counter() > self._deadline):
+            raise SearchTimeout
+
+    def _draft(self, depth):
+        """Return how many plies may still be searched below a node at depth."""
+        draft = self._cell_count - self._move_count
+        if self._depth_limit is not None:
+            draft = min(draft, self._depth_limit - depth - 1)
+        return draft
+
+    def _evaluate(self):
+        """Return the heuristic score of a non-terminal position."""
+        return self._evaluator.evaluate(
+            self._line_counts['O'], self._line_counts['X'])
+
+    def _terminal_score(self, label, depth):
+        """Return the score of a position where label just completed a line."""
+        if label == 'O':
+            score = self._win_scores['O'] - depth
+        else:
+            score = self._win_scores['X'] + depth
+        if self._stats is not None:
+            self._stats.terminal_hits += 1
+        return score
+
+    def _to_table_value(self, value, depth):
+        """Make a win score relative to the node so it can be reused."""
+        if value > self._evaluator.bound:
+            return value + depth
+        if value < -self._evaluator.bound:
+            return value - depth
+        return value
+
+    def _from_table_value(self, value, depth):
+        if value > self._evaluator.bound:
+            return value - depth
+        if value < -self._evaluator.bound:
+            return value + depth
+        return value
+
+    def _available_moves(self):
+        """Yield the empty cells as shared, preallocated Moves."""
+        cells = self._cells
+        return (move for index, move in enumerate(self._cell_moves)
+                if not cells[index])
+
+    def board_array(self):
+        """Return the position as an int8 array: 1 for "O", -1 for "X", 0 if empty."""
+        return np.array([CELL_CODES[label] for label in self._cells],
+                        dtype=np.int8).reshape(self.board_size, self.board_size)
+
+    def evaluate_positions(self, boards):
+        """Evaluate a stack of int8 boards, see LineEvaluator.evaluate_batch."""
+        return self._evaluator.evaluate_batch(boards)
+
+    def search_stats(self):
+        """Return the SearchStats collected so far, or None if trace is off.
+
+        Pondering and move analysis are not counted.
+        """
+        return self._search_stats
+
+    def cancel_search(self):
+        """Make a search running in another thread raise SearchCancelled.
+
+        The request stays in effect until reset_game() or resume_search()
+        is called.
+        """
+        self._stop_requested = True
+
+    def resume_search(self):
+        """Allow searches again after cancel_search(), keeping the position."""
+        self._stop_requested = False
+
+    def can_ponder(self):
+        """Return True if pondering is enabled and would help the next search.
+
+        Pondering fills the transposition table of this process, which only
+        the sequential minimax search reads, with that search's max_depth
+        and budgets.
+        """
+        return (self.ponder and self.engine == "minimax" and self.workers == 1
+                and self.engine_command is None
+                and (self._transposition_table is not None
+                     or self._shared_cache is not None)
+                and not self._has_winner and self._move_count < self._cell_count)
+
+    def ponder_replies(self):
+        """Search the position after each likely reply of "X", best first.
+
+        Meant to run in a background thread during the human's turn; the
+        results stay in the transposition table, so the search after the
+        human's move finds most of them there. Runs until every reply is
+        searched or cancel_search() is called. The position, the search
+        statistics and nodes_searched are unchanged when it returns.
+        """
+        if not self.can_ponder():
+            return
+        replies = self._order_moves(list(self._available_moves()), 'X')
+        nodes_searched = self.nodes_searched
+        self._stats = None
+        try:
+            for reply in replies:
+                if self._stop_requested:
+                    return
+                combo = self._make_move(reply.row, reply.col, 'X')
+                try:
+                    if (not combo and self._move_count < self._cell_count
+                            and self._perfect_play_move() is None
+                            and self._tablebase_move() is None):
+                        self.logger(f'PONDER -> x: {reply.row}, y: {reply.col}')
+                        self._minimax_move()
+                finally:
+                    self._unmake_move()
+        except SearchCancelled:
+            pass
+        finally:
+            self._stats = self._search_stats
+            self.nodes_searched = nodes_searched
+
+    def analyse_moves(self, label=None):
+        """Return a MoveAnalysis for every legal move of label, best first.
+
+        label defaults to the current player. Every move is searched with
+        a full window, so its score is exact rather than a bound, to the
+        end of the game or to max_depth; time and node budgets do not
+        apply. The searches share the transposition table, which also
+        makes repeated analysis of nearby positions cheap. Moves that tie
+        keep the move ordering. Raises SearchCancelled after
+        cancel_search(); the position is unchanged either way.
+        """
+        label = label or self.current_player.label
+        if self._has_winner or self._move_count == self._cell_count:
+            return []
+        is_maximizing = label == 'O'
+        sign = 1 if is_maximizing else -1
+        self._deadline = None
+        self._depth_limit = self.max_depth
+        self._killers = [[] for _ in range(self._cell_count + 1)]
+        self._nodes = 0
+        node_budget, self.node_budget = self.node_budget, None
+        self._stats = None
+        analysis = []
+        try:
+            for move in self._order_moves(list(self._available_moves()), label):
+                combo = self._make_move(move.row, move.col, label)
+                try:
+                    if combo:
+                        score, pv = self._terminal_score(label, 0), []
+                    else:
+                        score = self._minimax(0, float('-inf'), float('inf'),
+                                              not is_maximizing)
+                        pv = self._principal_variation(score, not is_maximizing)
+                finally:
+                    self._unmake_move()
+                played = Move(move.row, move.col, label)
+                analysis.append(MoveAnalysis(played, sign * score, [played] + pv))
+        finally:
+            self.node_budget = node_budget
+            self._stats = self._search_stats
+        analysis.sort(key=lambda entry: entry.score, reverse=True)
+        return analysis
+
+    def _principal_variation(self, score, is_maximizing):
+        """Return the moves from here on that keep the search's exact score.
+
+        Each step takes the first move, in search order, whose null-window
+        search around score confirms it; most of these are table hits.
+        """
+        pv = []
+        depth = 0
+        try:
+            while self._move_count < self._cell_count and self._draft(depth) > 0:
+                label = 'O' if is_maximizing else 'X'
+                found = combo = None
+                for move in self._order_moves(list(self._available_moves()), label):
+                    # The move joins pv before it is searched, so a cancelled
+                    # search still takes it back below.
+                    combo = self._make_move(move.row, move.col, label)
+                    pv.append(Move(move.row, move.col, label))
+                    if combo:
+                        child_score = self._terminal_score(label, depth + 1)
+                    else:
+                        child_score = self._minimax(depth + 1, score - 1, score + 1,
+                                                    not is_maximizing)
+                    if child_score == score:
+                        found = move
+                        break
+                    pv.pop()
+                    self._unmake_move()
+                if found is None or combo:
+                    break
+                depth += 1
+                is_maximizing = not is_maximizing
+        finally:
+            for _ in pv:
+                self._unmake_move()
+        return pv
 
     def has_winner(self):
         """Return True if the game has a winner, and False otherwise."""
@@ -164,7 +919,8 @@ class TicTacToeGame:
     def is_tied(self, current_moves: List[List[Move]] = None):
         """Return True if the game is tied, and False otherwise."""
         no_winner = not self._has_winner
-        current_moves = current_moves or self._current_moves
+        if current_moves is None:
+            return no_winner and self._move_count == self._cell_count
         played_moves = (
             move.label for row in current_moves for move in row
         )
@@ -185,11 +941,33 @@ class TicTacToeGame:
 
     def reset_game(self):
         """Reset the game state to play again."""
-        for row, row_content in enumerate(self._current_moves):
-            for col, _ in enumerate(row_content):
-                row_content[col] = Move(row, col)
+        self._cells[:] = [""] * self._cell_count
+        self._redo_moves.clear()
         self._has_winner = False
         self.winner_combo = []
+        self._reset_counters()
+        self._reset_history()
+        self._stop_requested = False
+
+    def set_board(self, board: List[List[Move]]):
+        """Replace the current position with board."""
+        self._set_cells([move.label for row in board for move in row])
+
+    def encode_position(self) -> int:
+        """Return the position as one base-3 integer; see encoding.py."""
+        return encode(self._cells)
+
+    def decode_position(self, key: int):
+        """Replace the current position with the one encode_position() returned."""
+        self._set_cells(decode(key, self._cell_count))
+
+    def _set_cells(self, labels: List[str]):
+        self._cells[:] = labels
+        self._redo_moves.clear()
+        self._reset_counters()
+        combo = self._check_winning()
+        self._has_winner = bool(combo)
+        self.winner_combo = combo or []
 
     def new_game_player(self):
         self.set_players()
@@ -205,12 +983,28 @@ class TicTacToeGame:
 
 
 class TicTacToeBoard(tk.Tk):
+    """The game window, with one Button per cell.
+
+    Cells are changed through _set_cell(), which keeps each cell's
+    CellState and passes only real changes to _render_cell(). A renderer
+    overrides _create_board_grid(), _render_cell() and _event_cell().
+    """
+
     def __init__(self, game: TicTacToeGame):
         super().__init__()
         self.title("Tic-Tac-Toe Game")
         self._cells = {}
         self._inverted_cells = {}
+        self._cell_states = {(row, col): CellState()
+                             for row in range(game.board_size)
+                             for col in range(game.board_size)}
         self._game = game
+        self._search_thread = None
+        self._search_results = None
+        self._ponder_thread = None
+        self._analysis_results = None
+        self._show_scores = tk.BooleanVar(master=self, value=False)
+        self._default_background = None
         self._create_menu()
         self._create_board_display()
         self._create_board_grid()
@@ -227,6 +1021,18 @@ class TicTacToeBoard(tk.Tk):
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=quit)
         menu_bar.add_cascade(label="File", menu=file_menu)
+        edit_menu = self._edit_menu = tk.Menu(master=menu_bar)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo,
+                              state=tk.DISABLED)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo,
+                              state=tk.DISABLED)
+        menu_bar.add_cascade(label="Edit", menu=edit_menu)
+        view_menu = tk.Menu(master=menu_bar)
+        view_menu.add_checkbutton(label="Move Scores", variable=self._show_scores,
+                                  command=self._toggle_scores)
+        menu_bar.add_cascade(label="View", menu=view_menu)
+        self.bind("<Control-z>", lambda event: self.undo())
+        self.bind("<Control-y>", lambda event: self.redo())
 
     def _create_board_display(self):
         display_frame = tk.Frame(master=self)
@@ -241,6 +1047,7 @@ class TicTacToeBoard(tk.Tk):
     def _create_board_grid(self):
         grid_frame = tk.Frame(master=self)
         grid_frame.pack()
+        cell_font = font.Font(size=36, weight="bold")
         for row in range(self._game.board_size):
             self.rowconfigure(row, weight=1, minsize=50)
             self.columnconfigure(row, weight=1, minsize=75)
@@ -248,25 +1055,58 @@ class TicTacToeBoard(tk.Tk):
                 button = tk.Button(
                     master=grid_frame,
                     text="",
-                    font=font.Font(size=36, weight="bold"),
+                    font=cell_font,
                     fg="black",
                     width=3,
                     height=2,
                     highlightbackground="lightblue",
                 )
+                self._default_background = button.cget("bg")
                 position = (row, col)
                 self._cells[button] = position
                 self._inverted_cells[position] = button
                 button.bind("<ButtonPress-1>", self.play)
                 button.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
 
+    def _event_cell(self, event):
+        """Return the (row, col) a click landed on, or None."""
+        return self._cells.get(event.widget)
+
+    def _render_cell(self, row, col, old: CellState, new: CellState):
+        """Draw the parts of a cell that changed from old to new."""
+        options = {}
+        if new.label != old.label:
+            options["text"] = new.label
+        if new.color != old.color:
+            options["fg"] = new.color
+        if new.background != old.background:
+            options["bg"] = new.background or self._default_background
+        if new.highlighted != old.highlighted:
+            options["highlightbackground"] = "red" if new.highlighted else "lightblue"
+        self._inverted_cells[(row, col)].config(**options)
+
+    def _set_cell(self, row, col, **changes):
+        """Change fields of a cell's CellState and redraw it if anything changed."""
+        old = self._cell_states[(row, col)]
+        new = old._replace(**changes)
+        if new != old:
+            self._cell_states[(row, col)] = new
+            self._render_cell(row, col, old, new)
+
     def play(self, event):
         """Handle a player's move."""
-        clicked_btn = event.widget
-        row, col = self._cells[clicked_btn]
+        if self.is_thinking():
+            return
+        position = self._event_cell(event)
+        if position is None:
+            return
+        self._stop_pondering()
+        row, col = position
         move = Move(row, col, self._game.current_player.label)
-        if self._game.is_valid_move(move):
-            self._update_button(clicked_btn)
+        if not self._game.is_valid_move(move):
+            self._start_pondering()
+        else:
+            self._update_cell(row, col)
             self._game.process_move(move)
             if self._game.is_tied():
                 self._update_display(msg="Tied game!", color="red")
@@ -282,10 +1122,119 @@ class TicTacToeBoard(tk.Tk):
                 if not self._game.current_player.is_human:
                     self._computer_play()
 
+    def is_thinking(self):
+        """Return True while the computer is searching for its move."""
+        return self._search_results is not None
+
     def _computer_play(self):
-        move = self._game._process_computer_move()
-        button = self._inverted_cells[(move.row, move.col)]
-        self._update_button(button)
+        """Start the computer's search in a worker thread."""
+        results = queue.Queue()
+        self._search_results = results
+        self._search_thread = threading.Thread(
+            target=self._search_worker, args=(results,), daemon=True)
+        self._update_display(msg="Thinking...")
+        self._search_thread.start()
+        self.after(SEARCH_POLL_MS, self._poll_search, results)
+
+    def _search_worker(self, results: queue.Queue):
+        try:
+            results.put(self._game._process_computer_move())
+        except SearchCancelled:
+            pass
+        except Exception as error:
+            results.put(error)
+
+    def _poll_search(self, results: queue.Queue):
+        if results is not self._search_results:
+            return
+        try:
+            move = results.get_nowait()
+        except queue.Empty:
+            self.after(SEARCH_POLL_MS, self._poll_search, results)
+            return
+        self._search_results = None
+        if isinstance(move, Exception):
+            raise move
+        self._finish_computer_play(move)
+
+    def _start_pondering(self):
+        """Score the human's moves and search their likely replies in a background thread.
+
+        Moves are scored only while View > Move Scores is checked.
+        """
+        game = self._game
+        if game.has_winner() or game.is_tied() or not game.current_player.is_human:
+            return
+        analyse = self._show_scores.get()
+        if analyse or game.can_ponder():
+            results = queue.Queue()
+            self._analysis_results = results if analyse else None
+            self._ponder_thread = threading.Thread(
+                target=self._ponder_worker, args=(results, analyse), daemon=True)
+            self._ponder_thread.start()
+            if analyse:
+                self.after(SEARCH_POLL_MS, self._poll_analysis, results)
+
+    def _ponder_worker(self, results: queue.Queue, analyse: bool):
+        if analyse:
+            try:
+                results.put(self._game.analyse_moves())
+            except (SearchCancelled, SearchTimeout):
+                return
+        self._game.ponder_replies()
+
+    def _poll_analysis(self, results: queue.Queue):
+        if results is not self._analysis_results:
+            return
+        try:
+            analysis = results.get_nowait()
+        except queue.Empty:
+            self.after(SEARCH_POLL_MS, self._poll_analysis, results)
+            return
+        self._analysis_results = None
+        self._show_heat_map(analysis)
+
+    def _stop_pondering(self):
+        """Stop pondering and wait for its thread, so the game can change."""
+        self._analysis_results = None
+        self._clear_heat_map()
+        if self._ponder_thread is not None:
+            self._game.cancel_search()
+            self._ponder_thread.join()
+            self._game.resume_search()
+            self._ponder_thread = None
+
+    def _toggle_scores(self):
+        """Show or hide the move scores of the human's turn."""
+        if self.is_thinking():
+            return
+        self._stop_pondering()
+        self._start_pondering()
+
+    def _show_heat_map(self, analysis: List[MoveAnalysis]):
+        """Color each empty cell by the score of playing there."""
+        bound = self._game._evaluator.bound
+        heuristic = [abs(entry.score) for entry in analysis if abs(entry.score) <= bound]
+        scale = max(heuristic, default=0) or 1
+        for entry in analysis:
+            self._set_cell(entry.move.row, entry.move.col,
+                           background=_heat_color(entry.score, bound, scale))
+
+    def _clear_heat_map(self):
+        for row, col in self._cell_states:
+            self._set_cell(row, col, background=None)
+
+    def _cancel_search(self):
+        """Stop a running search and wait for its thread to unwind."""
+        self._stop_pondering()
+        if self._search_thread is not None and self._search_thread.is_alive():
+            self._game.cancel_search()
+            self._search_thread.join()
+        self._search_thread = None
+        self._search_results = None
+
+    def _finish_computer_play(self, move: Move):
+        self._update_cell(move.row, move.col)
         if self._game.is_tied():
             self._update_display(msg="Tied game!", color="red")
         elif self._game.has_winner():
@@ -297,35 +1246,90 @@ class TicTacToeBoard(tk.Tk):
             self._game.toggle_player()
             msg = f"{self._game.current_player.label}'s turn"
             self._update_display(msg)
+            self._start_pondering()
 
-    def _update_button(self, clicked_btn, label: str = None, color: str = None):
+    def _update_cell(self, row, col, label: str = None, color: str = None):
         label = label or self._game.current_player.label
         color = color or self._game.current_player.color
-        clicked_btn.config(text=label)
-        clicked_btn.config(fg=color)
+        self._set_cell(row, col, label=label, color=color)
 
     def _update_display(self, msg, color="black"):
         self.display["text"] = msg
         self.display["fg"] = color
+        self._update_edit_menu()
+
+    def _update_edit_menu(self):
+        """Enable Undo and Redo only while the game can take them."""
+        thinking = self.is_thinking()
+        for label, enabled in (("Undo", self._game.can_undo()),
+                               ("Redo", self._game.can_redo())):
+            self._edit_menu.entryconfig(
+                label, state=tk.NORMAL if enabled and not thinking else tk.DISABLED)
 
     def _highlight_cells(self):
-        for button, coordinates in self._cells.items():
-            if coordinates in self._game.winner_combo:
-                button.config(highlightbackground="red")
+        for row, col in self._game.winner_combo:
+            self._set_cell(row, col, highlighted=True)
+
+    def undo(self):
+        """Take back moves until it is the human's turn again."""
+        if self.is_thinking() or not self._game.can_undo():
+            return
+        self._stop_pondering()
+        while self._game.undo_move() is not None:
+            if self._game.current_player.is_human:
+                break
+        self._refresh_board()
+        if not self._game.current_player.is_human:
+            self._computer_play()
+        else:
+            self._start_pondering()
+
+    def redo(self):
+        """Replay taken-back moves up to the human's next turn."""
+        if self.is_thinking() or not self._game.can_redo():
+            return
+        self._stop_pondering()
+        while self._game.redo_move() is not None:
+            if self._game.current_player.is_human:
+                break
+        self._refresh_board()
+        game_over = self._game.has_winner() or self._game.is_tied()
+        if not game_over and not self._game.current_player.is_human:
+            self._computer_play()
+        else:
+            self._start_pondering()
+
+    def _refresh_board(self):
+        """Redraw every cell and the display from the game's position."""
+        colors = {player.label: player.color for player in self._game._default_players}
+        size = self._game.board_size
+        for row, col in self._cell_states:
+            label = self._game._cells[row * size + col]
+            self._set_cell(row, col, label=label, color=colors.get(label, "black"),
+                           highlighted=False)
+        player = self._game.current_player
+        if self._game.has_winner():
+            self._highlight_cells()
+            self._update_display(f'Player "{player.label}" won!', player.color)
+        elif self._game.is_tied():
+            self._update_display(msg="Tied game!", color="red")
+        else:
+            self._update_display(f"{player.label}'s turn")
 
     def reset_board(self, is_human: bool):
         """Reset the game's board to play again."""
+        self._cancel_search()
         if is_human:
             self._game.new_game_player()
         else:
             self._game.new_game_computer()
         self._update_display(msg="Ready?")
-        for button in self._cells.keys():
-            button.config(highlightbackground="lightblue")
-            button.config(text="")
-            button.config(fg="black")
+        for row, col in self._cell_states:
+            self._set_cell(row, col, label="", color="black", highlighted=False)
         if not self._game.current_player.is_human:
             self._computer_play()
+        else:
+            self._start_pondering()
 
     def set_test_board(self):
         colors = {
@@ -347,22 +1351,156 @@ class TicTacToeBoard(tk.Tk):
             [Move(1, 0, ''), Move(1, 1, 'O'), Move(1, 2, '')],
             [Move(2, 0, 'O'), Move(2, 1, 'X'), Move(2, 2, 'X')]
         ]
-        self._game._current_moves = board
+        self._game.set_board(board)
         for row in range(self._game.board_size):
             for move in board[row]:
                 if move.label != '':
-                    button = self._inverted_cells[(move.row, move.col)]
-                    self._update_button(
-                        button, label=move.label, color=colors[move.label])
+                    self._update_cell(
+                        move.row, move.col, label=move.label, color=colors[move.label])
         if not self._game.current_player.is_human:
             self._computer_play()
 
 
+class CanvasTicTacToeBoard(TicTacToeBoard):
+    """The game window drawn on a single Canvas, for large boards.
+
+    All cells share one font. Canvas items are created the first time a
+    cell needs them and only changed cells are redrawn, so opening and
+    resetting a 19x19 board touches almost nothing. Clicks are mapped to
+    cells from their coordinates.
+    """
+
+    def _create_board_grid(self):
+        size = self._game.board_size
+        self._cell_pixels = max(CANVAS_MIN_CELL_PIXELS,
+                                min(CANVAS_MAX_CELL_PIXELS, CANVAS_BOARD_PIXELS // size))
+        extent = size * self._cell_pixels
+        self._canvas = tk.Canvas(master=self, width=extent, height=extent,
+                                 highlightthickness=0)
+        self._canvas.pack(padx=5, pady=5)
+        # A negative size is in pixels, so pieces fill the same share of
+        # every cell size.
+        self._cell_font = font.Font(size=-int(self._cell_pixels * 0.6), weight="bold")
+        for line in range(size + 1):
+            offset = line * self._cell_pixels
+            self._canvas.create_line(offset, 0, offset, extent, fill="lightblue")
+            self._canvas.create_line(0, offset, extent, offset, fill="lightblue")
+        self._text_items = {}
+        self._background_items = {}
+        self._highlight_items = {}
+        self._canvas.bind("<ButtonPress-1>", self.play)
+
+    def _event_cell(self, event):
+        row, col = int(event.y // self._cell_pixels), int(event.x // self._cell_pixels)
+        size = self._game.board_size
+        if 0 <= row < size and 0 <= col < size:
+            return row, col
+        return None
+
+    def _cell_item(self, items, row, col, create):
+        item = items.get((row, col))
+        if item is None:
+            pixels = self._cell_pixels
+            item = items[(row, col)] = create(col * pixels, row * pixels, pixels)
+        return item
+
+    def _render_cell(self, row, col, old: CellState, new: CellState):
+        canvas = self._canvas
+        if new.background != old.background:
+            item = self._cell_item(
+                self._background_items, row, col,
+                lambda x, y, pixels: canvas.create_rectangle(
+                    x + 1, y + 1, x + pixels - 1, y + pixels - 1, width=0))
+            canvas.tag_lower(item)
+            canvas.itemconfig(item, fill=new.background or "",
+                              state=tk.NORMAL if new.background else tk.HIDDEN)
+        if new.highlighted != old.highlighted:
+            item = self._cell_item(
+                self._highlight_items, row, col,
+                lambda x, y, pixels: canvas.create_rectangle(
+                    x + 2, y + 2, x + pixels - 2, y + pixels - 2,
+                    outline="red", width=3))
+            canvas.itemconfig(item, state=tk.NORMAL if new.highlighted else tk.HIDDEN)
+        if new.label != old.label or new.color != old.color:
+            item = self._cell_item(
+                self._text_items, row, col,
+                lambda x, y, pixels: canvas.create_text(
+                    x + pixels / 2, y + pixels / 2, font=self._cell_font))
+            canvas.itemconfig(item, text=new.label, fill=new.color)
+
+
+def _heat_color(score, bound, scale):
+    """Return the heat-map color of a move score.
+
+    Wins and losses get their own colors; heuristic scores shade from the
+    loss color through HEAT_MAP_EVEN to the win color, relative to scale.
+    """
+    if score > bound:
+        return HEAT_MAP_WIN
+    if score < -bound:
+        return HEAT_MAP_LOSS
+    fraction = max(-1.0, min(1.0, score / scale))
+    target = HEAT_MAP_WIN if fraction > 0 else HEAT_MAP_LOSS
+    target = tuple(int(target[i:i + 2], 16) for i in (1, 3, 5))
+    channels = (round(even + (goal - even) * abs(fraction))
+                for even, goal in zip(HEAT_MAP_EVEN, target))
+    return "#" + "".join(f"{channel:02x}" for channel in channels)
+
+
 def main():
     """Create the game's board and run its main loop."""
-    game = TicTacToeGame()
-    board = TicTacToeBoard(game)
-    board.mainloop()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--board-size", type=int, default=BOARD_SIZE)
+    parser.add_argument("--win-length", type=int, default=None,
+                        help="pieces in a row needed to win (default: board size)")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="plies searched before the heuristic evaluation "
+                             f"(default: full search, {LARGE_BOARD_DEPTH} on "
+                             f"boards larger than {LARGE_BOARD_SIZE}x{LARGE_BOARD_SIZE})")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="seconds the computer may think per move "
+                             f"(default: unlimited, {LARGE_BOARD_TIME_BUDGET} on "
+                             f"boards larger than {LARGE_BOARD_SIZE}x{LARGE_BOARD_SIZE})")
+    parser.add_argument("--node-budget", type=int, default=None,
+                        help="search nodes the computer may visit per move")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes that search root moves in parallel")
+    parser.add_argument("--engine", choices=ENGINES, default="minimax")
+    parser.add_argument("--ponder", action="store_true",
+                        help="search the likely replies while the human thinks")
+    parser.add_argument("--cache", metavar="PATH", default=None,
+                        help="file of a search cache shared with other processes "
+                             "and kept across restarts")
+    parser.add_argument("--renderer", choices=RENDERERS, default=None,
+                        help="draw cells as buttons or on one canvas (default: "
+                             f"canvas on boards larger than {LARGE_BOARD_SIZE}x"
+                             f"{LARGE_BOARD_SIZE})")
+    parser.add_argument("--engine-command", default=None,
+                        help='run the computer in a separate process, e.g. '
+                             '"python engine.py --engine mcts"')
+    args = parser.parse_args()
+    max_depth = args.max_depth
+    time_budget = args.time_budget
+    if args.board_size > LARGE_BOARD_SIZE:
+        if max_depth is None and args.engine != "auto":
+            max_depth = LARGE_BOARD_DEPTH
+        if time_budget is None:
+            time_budget = LARGE_BOARD_TIME_BUDGET
+    game = TicTacToeGame(board_size=args.board_size, win_length=args.win_length,
+                         max_depth=max_depth, engine=args.engine,
+                         time_budget=time_budget, node_budget=args.node_budget,
+                         workers=args.workers, shared_cache=args.cache,
+                         ponder=args.ponder,
+                         engine_command=(shlex.split(args.engine_command)
+                                         if args.engine_command else None))
+    renderer = args.renderer or (
+        "canvas" if args.board_size > LARGE_BOARD_SIZE else "buttons")
+    board_class = CanvasTicTacToeBoard if renderer == "canvas" else TicTacToeBoard
+    board = board_class(game)
+    try:
+        board.mainloop()
+    finally:
+        game.close()
 
 
 if __name__ == "__main__":
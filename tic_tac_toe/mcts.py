@@ -0,0 +1,239 @@
+"""Monte Carlo Tree Search engine for large boards.
+
+UCT search over the game's own make/unmake moves. Every expanded leaf is
+scored with a batch of random playouts that are run together with NumPy:
+each playout is a random order of the empty cells, and the winner is the
+player whose line is completed first in that order. The tree is kept
+between moves and its subtree reused when the game reaches one of its
+positions.
+"""
+import math
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+DEFAULT_EXPLORATION = 1.4
+DEFAULT_PLAYOUTS = 20000
+DEFAULT_BATCH_SIZE = 64
+NEIGHBOURHOOD_BOARD_SIZE = 6
+NEIGHBOURHOOD_RADIUS = 2
+
+O_CODE, X_CODE = 1, -1
+
+
+class Node:
+    """A position in the search tree, reached by ``player`` playing ``cell``."""
+
+    __slots__ = ("cell", "player", "parent", "children", "untried",
+                 "visits", "wins", "terminal_value")
+
+    def __init__(self, cell: Optional[int], player: int, parent: Optional["Node"]):
+        self.cell = cell
+        self.player = player
+        self.parent = parent
+        self.children: List[Node] = []
+        self.untried: Optional[List[int]] = None
+        self.visits = 0
+        # Sum of playout results from the point of view of ``player``.
+        self.wins = 0.0
+        self.terminal_value: Optional[float] = None
+
+
+class MCTSEngine:
+    """UCT search with batched NumPy playouts for a ``TicTacToeGame``.
+
+    exploration is the UCT constant, playouts the number of random games
+    per move and time_budget an optional limit in seconds; the search stops
+    at whichever comes first. Tree expansion only considers cells within
+    radius of a played piece (the whole board when radius is None).
+    """
+
+    def __init__(self, game, exploration: float = DEFAULT_EXPLORATION,
+                 playouts: int = DEFAULT_PLAYOUTS, time_budget: Optional[float] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, radius: Optional[int] = -1,
+                 seed: Optional[int] = None):
+        self.game = game
+        self.exploration = exploration
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.batch_size = batch_size
+        if radius == -1:
+            radius = (NEIGHBOURHOOD_RADIUS
+                      if game.board_size >= NEIGHBOURHOOD_BOARD_SIZE else None)
+        self.radius = radius
+        self.playouts_run = 0
+        self._rng = np.random.default_rng(seed)
+        self._line_cells = game._evaluator.line_cells
+        self._root: Optional[Node] = None
+        self._root_board: Optional[np.ndarray] = None
+
+    def search(self, is_cancelled: Callable[[], bool] = lambda: False):
+        """Return (cell index, win rate) of the best move for "O".
+
+        Returns (None, None) if is_cancelled() became true.
+        """
+        board = self.game.board_array().reshape(-1)
+        root = self._reuse_root(board)
+        deadline = (time.perf_counter() + self.time_budget
+                    if self.time_budget is not None else None)
+        self.playouts_run = 0
+        while self.playouts_run < self.playouts:
+            if is_cancelled():
+                return None, None
+            self._iterate(root, board.copy())
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        self._root, self._root_board = root, board
+
+        best = max(root.children, key=lambda child: child.visits)
+        return best.cell, best.wins / best.visits
+
+    def _reuse_root(self, board: np.ndarray) -> Node:
+        """Return the stored node for board, or a fresh root if there is none."""
+        node = self._root
+        if node is not None:
+            played = np.flatnonzero((self._root_board == 0) & (board != 0))
+            changed = np.flatnonzero(self._root_board != board)
+            if len(played) == len(changed):
+                remaining = set(played.tolist())
+                while remaining and node is not None:
+                    node = next((child for child in node.children
+                                 if child.cell in remaining
+                                 and board[child.cell] == child.player), None)
+                    if node is not None:
+                        remaining.discard(node.cell)
+                if node is not None and not remaining and node.player == X_CODE:
+                    node.parent = None
+                    return node
+        return Node(None, X_CODE, None)
+
+    def _iterate(self, root: Node, board: np.ndarray):
+        game = self.game
+        size = game.board_size
+        made = []
+        node = root
+        try:
+            # Selection: follow UCT through fully expanded nodes.
+            while (node.terminal_value is None and node.untried is not None
+                   and not node.untried and node.children):
+                node = self._select_child(node)
+                made.append(node.cell)
+                board[node.cell] = node.player
+                game._make_move(*divmod(node.cell, size), _label(node.player))
+
+            # Expansion: add one untried move.
+            if node.terminal_value is None:
+                if node.untried is None:
+                    node.untried = self._candidate_cells(board, -node.player)
+                if node.untried:
+                    cell = node.untried.pop(
+                        int(self._rng.integers(len(node.untried))))
+                    child = Node(cell, -node.player, node)
+                    node.children.append(child)
+                    node = child
+                    made.append(cell)
+                    board[cell] = child.player
+                    if game._make_move(*divmod(cell, size), _label(child.player)):
+                        child.terminal_value = 1.0
+                    elif not (board == 0).any():
+                        child.terminal_value = 0.5
+
+            # Simulation.
+            if node.terminal_value is not None:
+                count = self.batch_size
+                o_total = (node.terminal_value if node.player == O_CODE
+                           else 1.0 - node.terminal_value) * count
+            else:
+                count = self.batch_size
+                o_total = self._playouts(board, -node.player, count)
+            self.playouts_run += count
+        finally:
+            for _ in made:
+                game._unmake_move()
+
+        # Backpropagation.
+        while node is not None:
+            node.visits += count
+            node.wins += o_total if node.player == O_CODE else count - o_total
+            node = node.parent
+
+    def _select_child(self, node: Node) -> Node:
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        return max(
+            node.children,
+            key=lambda child: (child.wins / child.visits
+                               + exploration * math.sqrt(log_visits / child.visits)),
+        )
+
+    def _candidate_cells(self, board: np.ndarray, to_move: int) -> List[int]:
+        """Return the cells worth expanding for to_move.
+
+        A cell that wins at once, or failing that one that blocks the
+        opponent's immediate win, is the only candidate; random playouts
+        are too noisy to find these reliably on large boards.
+        """
+        for player in (to_move, -to_move):
+            forced = self._winning_cells(board, player)
+            if forced:
+                return forced[:1]
+        empty = board == 0
+        if self.radius is not None and not empty.all():
+            size = self.game.board_size
+            occupied = (~empty).reshape(size, size)
+            near = np.zeros_like(occupied)
+            radius = self.radius
+            for row_step in range(-radius, radius + 1):
+                for col_step in range(-radius, radius + 1):
+                    near |= _shift(occupied, row_step, col_step)
+            empty = empty & near.reshape(-1)
+        return np.flatnonzero(empty).tolist()
+
+    def _winning_cells(self, board: np.ndarray, player: int) -> List[int]:
+        """Return the empty cells that would complete a line for player."""
+        lines = board[self._line_cells]
+        open_lines = (((lines == player).sum(axis=1) == lines.shape[1] - 1)
+                      & ((lines == -player).sum(axis=1) == 0))
+        if not open_lines.any():
+            return []
+        cells = self._line_cells[open_lines]
+        return np.unique(cells[board[cells] == 0]).tolist()
+
+    def _playouts(self, board: np.ndarray, to_move: int, count: int) -> float:
+        """Play count random games from board and return the sum of "O"'s results.
+
+        A win counts 1, a tie 0.5 and a loss 0.
+        """
+        empty = np.flatnonzero(board == 0)
+        moves = len(empty)
+        order = self._rng.random((count, moves)).argsort(axis=1)
+        cells = empty[order]
+        rows = np.arange(count)[:, None]
+        owners = np.repeat(board[None, :], count, axis=0)
+        owners[rows, cells] = np.where(np.arange(moves) % 2 == 0, to_move, -to_move)
+        turns = np.zeros(owners.shape, dtype=np.int32)
+        turns[rows, cells] = np.arange(1, moves + 1)
+
+        line_owners = owners[:, self._line_cells]
+        line_turns = turns[:, self._line_cells].max(axis=2)
+        never = moves + 1
+        o_first = np.where((line_owners == O_CODE).all(axis=2), line_turns, never).min(axis=1)
+        x_first = np.where((line_owners == X_CODE).all(axis=2), line_turns, never).min(axis=1)
+        results = np.where(o_first < x_first, 1.0, np.where(x_first < o_first, 0.0, 0.5))
+        return float(results.sum())
+
+
+def _label(player: int) -> str:
+    return "O" if player == O_CODE else "X"
+
+
+def _shift(grid: np.ndarray, row_step: int, col_step: int) -> np.ndarray:
+    """Return grid moved by (row_step, col_step), filling with False."""
+    shifted = np.zeros_like(grid)
+    rows, cols = grid.shape
+    shifted[max(row_step, 0):rows + min(row_step, 0),
+            max(col_step, 0):cols + min(col_step, 0)] = \
+        grid[max(-row_step, 0):rows + min(-row_step, 0),
+             max(-col_step, 0):cols + min(-col_step, 0)]
+    return shifted
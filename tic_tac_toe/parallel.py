@@ -0,0 +1,220 @@
+"""Parallel root-split search over a process pool.
+
+The root moves of a position are searched by worker processes, each with
+its own ``TicTacToeGame``. The best exact score found so far is shared
+through a ``multiprocessing.Value`` and used as the alpha bound of every
+root move that starts after it. Every search has a generation number;
+root moves of an older search stop at their next node and do not touch
+the shared bound. Run this module to measure the speedup:
+
+    python parallel.py --board-size 4 --pieces 3 --max-workers 4
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+import time
+from typing import Callable, Optional, Tuple
+
+CANCEL_POLL_SECONDS = 0.05
+
+_worker_game = None
+_worker_alpha = None
+_worker_generation = None
+
+
+class _StaleSearch:
+    """Stands in for TicTacToeGame._stop_requested in a worker.
+
+    It is true once a newer search has started, so _minimax raises
+    SearchCancelled at its next node.
+    """
+
+    __slots__ = ("generation",)
+
+    def __init__(self, generation: int):
+        self.generation = generation
+
+    def __bool__(self):
+        return _worker_generation.value != self.generation
+
+
+def _init_worker(config: dict, alpha, generation):
+    global _worker_game, _worker_alpha, _worker_generation
+    from main import TicTacToeGame
+
+    _worker_game = TicTacToeGame(use_perfect_play=False, **config)
+    _worker_alpha = alpha
+    _worker_generation = generation
+
+
+def _search_root_move(position: int, row: int, col: int, max_depth, generation: int):
+    """Search one root move of an encoded position to max_depth and return (score, nodes).
+
+    The score is None if a newer search started meanwhile.
+    """
+    from main import SearchCancelled
+
+    game = _worker_game
+    game.decode_position(position)
+    game.max_depth = game._depth_limit = max_depth
+    game._stop_requested = _StaleSearch(generation)
+    # Searching from one below the shared bound keeps root moves that tie
+    # with the best score exact, so the merge can break ties by root order
+    # exactly like the sequential search.
+    alpha = _worker_alpha.value - 1
+    game._nodes = 0
+    combo = game._make_move(row, col, 'O')
+    try:
+        if combo:
+            score = game._terminal_score('O', 0)
+        else:
+            score = game._minimax(0, alpha, float('inf'), False)
+    except SearchCancelled:
+        return None, game._nodes
+    finally:
+        game._unmake_move()
+    if score > alpha:
+        # The generation is bumped under the same lock, so a superseded
+        # search cannot raise the next search's bound.
+        with _worker_alpha.get_lock():
+            if (_worker_generation.value == generation
+                    and score > _worker_alpha.value):
+                _worker_alpha.value = score
+    return score, game._nodes
+
+
+class ParallelRootSearch:
+    """A process pool that searches root moves in parallel.
+
+    The first root move is searched alone, Young-Brothers-Wait style, so
+    that every other root move starts with a real alpha bound.
+    """
+
+    def __init__(self, config: dict, workers: int):
+        self.workers = workers
+        self._alpha = multiprocessing.Value('d', float('-inf'))
+        # Written only under the alpha lock.
+        self._generation = multiprocessing.Value('i', 0, lock=False)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(config, self._alpha, self._generation))
+
+    def search(self, position: int, moves: list,
+               is_cancelled: Callable[[], bool] = lambda: False,
+               max_depth: Optional[int] = None) -> Tuple[object, float, int]:
+        """Return (best move, score, nodes) for "O" over moves, in order.
+
+        position is the key of TicTacToeGame.encode_position(). max_depth
+        limits the search like TicTacToeGame.max_depth, for this call only.
+
+        Returns None as the move if is_cancelled() became true.
+        """
+        with self._alpha.get_lock():
+            self._generation.value += 1
+            self._alpha.value = float('-inf')
+        generation = self._generation.value
+        first = self._executor.submit(
+            _search_root_move, position, moves[0].row, moves[0].col, max_depth,
+            generation)
+        if not self._wait([first], is_cancelled):
+            return None, None, 0
+        futures = [first] + [
+            self._executor.submit(_search_root_move, position, move.row, move.col,
+                                  max_depth, generation)
+            for move in moves[1:]
+        ]
+        if not self._wait(futures, is_cancelled):
+            return None, None, 0
+
+        bestMove, bestScore, nodes = None, float('-inf'), 0
+        for move, future in zip(moves, futures):
+            score, move_nodes = future.result()
+            nodes += move_nodes
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+        return bestMove, bestScore, nodes
+
+    def _wait(self, futures, is_cancelled) -> bool:
+        pending = set(futures)
+        while pending:
+            if is_cancelled():
+                for future in pending:
+                    future.cancel()
+                return False
+            _, pending = wait(pending, timeout=CANCEL_POLL_SECONDS,
+                              return_when=FIRST_COMPLETED)
+        return True
+
+    def close(self):
+        self._executor.shutdown()
+
+
+def _random_position(game, pieces: int, seed: int):
+    """Place pieces random pieces, "X" first, so that "O" is to move.
+
+    pieces must be odd: the search always moves for "O".
+    """
+    if pieces % 2 == 0:
+        raise ValueError(f"pieces must be odd so that O is to move, got {pieces}")
+    import random
+    from main import Move
+
+    rng = random.Random(seed)
+    size = game.board_size
+    while True:
+        game.reset_game()
+        cells = rng.sample(range(size * size), pieces)
+        for turn, index in enumerate(cells):
+            game.process_move(Move(*divmod(index, size), "XO"[turn % 2]))
+            if game.has_winner():
+                break
+        else:
+            return
+
+
+def report_speedup(board_size: int, win_length: int, max_depth, pieces: int,
+                   max_workers: int, seed: int = 0):
+    """Time one search with 1..max_workers processes against the sequential one."""
+    from main import TicTacToeGame
+
+    results = []
+    for workers in range(0, max_workers + 1):
+        game = TicTacToeGame(board_size=board_size, win_length=win_length,
+                             max_depth=max_depth, use_perfect_play=False,
+                             workers=max(workers, 1))
+        _random_position(game, pieces, seed)
+        if workers:
+            # Start the pool before timing so process start-up is excluded.
+            game._parallel_search()
+        started = time.perf_counter()
+        move, score = game._minimax_move()
+        elapsed = time.perf_counter() - started
+        game.close()
+        results.append((workers, move, score, elapsed))
+
+    _, sequential_move, _, sequential_time = results[0]
+    print(f"{'workers':>8} {'move':>8} {'score':>8} {'seconds':>9} {'speedup':>8}")
+    for workers, move, score, elapsed in results:
+        name = workers or "seq"
+        same = "" if move == sequential_move else "  MISMATCH"
+        print(f"{name:>8} {str((move.row, move.col)):>8} {score:>8} "
+              f"{elapsed:>9.3f} {sequential_time / elapsed:>8.2f}{same}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure parallel root-split speedup.")
+    parser.add_argument("--board-size", type=int, default=4)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--pieces", type=int, default=3,
+                        help="random pieces placed before searching, an odd "
+                             "number so that O is to move")
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.pieces % 2 == 0:
+        parser.error("--pieces must be odd so that O is to move")
+    report_speedup(args.board_size, args.win_length, args.max_depth, args.pieces,
+                   args.max_workers, args.seed)
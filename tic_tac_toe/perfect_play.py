@@ -0,0 +1,78 @@
+"""Precomputed perfect-play move table for the 3x3 game.
+
+The table maps every reachable 3x3 position where the computer ("O") is to
+move to its minimax score and best move. It is generated once with the
+game's own ``_minimax`` search and loaded when ``main`` is imported:
+
+    python perfect_play.py
+"""
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+
+
+TABLE_VERSION = 1
+TABLE_BOARD_SIZE = 3
+TABLE_PATH = Path(__file__).with_name("perfect_play_3x3.json")
+
+
+def load_table(path: Path = TABLE_PATH) -> Dict[int, Tuple[int, int, int]]:
+    """Return {position key: (score, row, col)}, or {} if the file is unusable."""
+    try:
+        with open(path) as table_file:
+            data = json.load(table_file)
+    except (OSError, ValueError):
+        return {}
+    if (data.get("version") != TABLE_VERSION
+            or data.get("board_size") != TABLE_BOARD_SIZE):
+        return {}
+    return {int(key): tuple(entry) for key, entry in data["entries"].items()}
+
+
+def build_table() -> Dict[int, Tuple[int, int, int]]:
+    """Search every reachable position with "O" to move."""
+    from main import TicTacToeGame
+
+    game = TicTacToeGame(board_size=TABLE_BOARD_SIZE, use_perfect_play=False)
+    cells = [(row, col) for row in range(TABLE_BOARD_SIZE)
+             for col in range(TABLE_BOARD_SIZE)]
+    table = {}
+    seen = set()
+
+    def visit(label):
+        key = game.encode_position()
+        if (key, label) in seen:
+            return
+        seen.add((key, label))
+        if game.is_tied():
+            return
+        if label == "O":
+            move, score = game._minimax_move()
+            table[key] = (score, move.row, move.col)
+        next_label = "X" if label == "O" else "O"
+        for row, col in cells:
+            if game._cells[row * TABLE_BOARD_SIZE + col] == "":
+                if not game._make_move(row, col, label):
+                    visit(next_label)
+                game._unmake_move()
+
+    visit("X")
+    visit("O")
+    return table
+
+
+def write_table(table: Dict[int, Tuple[int, int, int]], path: Path = TABLE_PATH):
+    data = {
+        "version": TABLE_VERSION,
+        "board_size": TABLE_BOARD_SIZE,
+        "entries": {str(key): list(table[key]) for key in sorted(table)},
+    }
+    with open(path, "w") as table_file:
+        json.dump(data, table_file, separators=(",", ":"))
+        table_file.write("\n")
+
+
+if __name__ == "__main__":
+    table = build_table()
+    write_table(table)
+    print(f"Wrote {len(table)} positions to {TABLE_PATH}")
@@ -0,0 +1,349 @@
+"""Depth-first proof-number (df-pn) solver.
+
+Proves the theoretical result of a position by searching it with the
+game's own move generation, win detection and symmetric Zobrist keys.
+Each question "can the attacker force a win?" is answered by df-pn, in
+the negamax form where every node keeps (phi, delta): the proof and
+disproof numbers from the point of view of the side to move. A draw
+counts as a failure for the attacker, so solving a position takes at
+most two proofs: one for each side as the attacker.
+
+The node table is bounded; when it fills up, the half of it that cost
+the least work to compute is dropped, unsolved entries first. The
+tables can be saved to a checkpoint file, so an interrupted solve
+resumes where it stopped:
+
+    python pns.py --board-size 5 --win-length 4 --checkpoint 5x5k4.pns
+"""
+import argparse
+import os
+import pickle
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+INF = 1 << 40
+DEFAULT_TABLE_SIZE = 1 << 20
+DEFAULT_REPORT_INTERVAL = 5.0
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+CHECKPOINT_VERSION = 1
+CLOCK_CHECK_NODES = 4096
+
+
+class ProofTable:
+    """Bounded map of position key -> (phi, delta, work)."""
+
+    def __init__(self, capacity: int = DEFAULT_TABLE_SIZE):
+        self.capacity = capacity
+        self.entries: Dict[int, Tuple[int, int, int]] = {}
+        self.collections = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: int) -> Optional[Tuple[int, int, int]]:
+        return self.entries.get(key)
+
+    def store(self, key: int, phi: int, delta: int, work: int):
+        self.entries[key] = (phi, delta, work)
+        if len(self.entries) > self.capacity:
+            self._collect()
+
+    def _collect(self):
+        """Drop the cheapest half of the table, keeping solved entries first."""
+        ranked = sorted(
+            self.entries.items(),
+            key=lambda item: (item[1][0] == 0 or item[1][1] == 0, item[1][2]))
+        for key, _ in ranked[:len(ranked) // 2]:
+            del self.entries[key]
+        self.collections += 1
+
+
+class ProofNumberSolver:
+    """df-pn solver for the position of a ``TicTacToeGame``.
+
+    The game's board is used as the search board and is restored after
+    every call. Progress lines are passed to report every report_interval
+    seconds; with a checkpoint path the tables are loaded from it when it
+    matches the game and saved to it every checkpoint_interval seconds and
+    when a proof ends.
+    """
+
+    def __init__(self, game, table_size: int = DEFAULT_TABLE_SIZE,
+                 checkpoint: Optional[str] = None,
+                 checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+                 report_interval: Optional[float] = DEFAULT_REPORT_INTERVAL,
+                 report: Callable[[str], None] = print):
+        self.game = game
+        self.table_size = table_size
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.report_interval = report_interval
+        self.report = report
+        self.nodes = 0
+        self._tables: Dict[str, ProofTable] = {}
+        self._attacker = None
+        self._table: Optional[ProofTable] = None
+        self._root_to_move = None
+        self._root_children: List[List] = []
+        self._started = 0.0
+        self._start_nodes = 0
+        self._next_report = None
+        self._next_checkpoint = None
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self._load_checkpoint()
+
+    def solve(self, to_move: str) -> str:
+        """Return the result with best play, "X", "O" or "draw", for to_move to move."""
+        other = _other(to_move)
+        if self.prove(to_move, to_move):
+            return to_move
+        if self.prove(other, to_move):
+            return other
+        return "draw"
+
+    def prove(self, attacker: str, to_move: str) -> bool:
+        """Return True if attacker can force a win with to_move to move."""
+        self._attacker = attacker
+        self._table = self._tables.setdefault(attacker, ProofTable(self.table_size))
+        self._root_to_move = to_move
+        self._root_children = self._children(to_move)
+        self._started = time.perf_counter()
+        self._start_nodes = self.nodes
+        if self.report_interval is not None:
+            self._next_report = self._started + self.report_interval
+        if self.checkpoint is not None:
+            self._next_checkpoint = self._started + self.checkpoint_interval
+        phi, delta = self._mid(to_move, INF, INF)
+        if self.checkpoint is not None:
+            self.save_checkpoint()
+        if self.report_interval is not None:
+            self._report_progress()
+        return phi == 0 if to_move == attacker else delta == 0
+
+    def best_move(self, to_move: str):
+        """Return (move, result) of a move that keeps the best result for to_move."""
+        game = self.game
+        result = self.solve(to_move)
+        moves = game._order_moves(list(game._available_moves()), to_move)
+        fallback = None
+        for move in moves:
+            combo = game._make_move(move.row, move.col, to_move)
+            try:
+                if combo:
+                    return move, to_move
+                if game._move_count == game._cell_count:
+                    reply_result = "draw"
+                else:
+                    reply_result = self.solve(_other(to_move))
+            finally:
+                game._unmake_move()
+            if reply_result == result:
+                return move, result
+            if fallback is None:
+                fallback = move
+        return fallback, result
+
+    def _key(self, to_move: str) -> int:
+        game = self.game
+        return game._hasher.canonical(game._hashes, to_move == "O")
+
+    def _children(self, to_move: str) -> List[List]:
+        """Return [cell, key, phi, delta] per move; key is None once the game is decided.
+
+        A position is decided for the attacker's question as soon as every
+        line holds a defender piece, even though play goes on.
+        """
+        game = self.game
+        other = _other(to_move)
+        wins = self._completing_cells(to_move)
+        if wins:
+            return [[min(wins), None, INF, 0]]
+        moves = game._order_moves(list(game._available_moves()), to_move)
+        # Any move that leaves a line of the opponent open loses at once,
+        # so only blocks are searched.
+        blocks = self._completing_cells(other)
+        children = []
+        for move in moves:
+            cell = move.row * game.board_size + move.col
+            if blocks and cell not in blocks:
+                continue
+            combo = game._make_move(move.row, move.col, to_move)
+            try:
+                if combo:
+                    # The side to move in the child has lost.
+                    children.append([cell, None, INF, 0])
+                elif (game._move_count == game._cell_count
+                      or not self._attacker_has_line()):
+                    # A draw is a failure for the attacker.
+                    if other == self._attacker:
+                        children.append([cell, None, INF, 0])
+                    else:
+                        children.append([cell, None, 0, INF])
+                else:
+                    children.append([cell, self._key(other), 1, 1])
+            finally:
+                game._unmake_move()
+        return children
+
+    def _attacker_has_line(self) -> bool:
+        """Return True while some line holds none of the defender's pieces."""
+        return 0 in self.game._line_counts[_other(self._attacker)]
+
+    def _completing_cells(self, label: str) -> Set[int]:
+        """Return the empty cells that would complete a line for label."""
+        game = self.game
+        counts = game._line_counts[label]
+        opposing = game._line_counts[_other(label)]
+        needed = game._combo_length - 1
+        cells = set()
+        for line, count in enumerate(counts):
+            if count == needed and not opposing[line]:
+                for row, col in game._winning_combos[line]:
+                    index = row * game.board_size + col
+                    if not game._cells[index]:
+                        cells.add(index)
+        return cells
+
+    def _numbers(self, children: List[List]) -> Tuple[int, int, int, int]:
+        """Return phi, delta, the best child and the second-smallest child delta.
+
+        Children found in the table are refreshed from it first.
+        """
+        table = self._table
+        phi, delta = INF, 0
+        best, second = 0, INF
+        for index, child in enumerate(children):
+            if child[1] is not None:
+                entry = table.get(child[1])
+                if entry is not None:
+                    child[2], child[3] = entry[0], entry[1]
+            delta = min(delta + child[2], INF)
+            if child[3] < phi:
+                second = phi
+                phi, best = child[3], index
+            elif child[3] < second:
+                second = child[3]
+        return phi, delta, best, second
+
+    def _mid(self, to_move: str, phi_threshold: int, delta_threshold: int
+             ) -> Tuple[int, int]:
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK_NODES == 0:
+            self._check_clock()
+        game = self.game
+        key = self._key(to_move)
+        entry = self._table.get(key)
+        if entry is not None and (entry[0] >= phi_threshold
+                                  or entry[1] >= delta_threshold):
+            return entry[0], entry[1]
+
+        start_nodes = self.nodes
+        children = self._children(to_move)
+        other = _other(to_move)
+        while True:
+            phi, delta, best, second = self._numbers(children)
+            if phi >= phi_threshold or delta >= delta_threshold:
+                break
+            child = children[best]
+            move = game._cell_moves[child[0]]
+            game._make_move(move.row, move.col, to_move)
+            try:
+                child[2], child[3] = self._mid(
+                    other,
+                    min(delta_threshold - delta + child[2], INF),
+                    min(phi_threshold, second + 1))
+            finally:
+                game._unmake_move()
+        self._table.store(key, phi, delta, self.nodes - start_nodes)
+        return phi, delta
+
+    def _check_clock(self):
+        now = time.perf_counter()
+        if self._next_report is not None and now >= self._next_report:
+            self._report_progress()
+            self._next_report = now + self.report_interval
+        if self._next_checkpoint is not None and now >= self._next_checkpoint:
+            self.save_checkpoint()
+            self._next_checkpoint = now + self.checkpoint_interval
+
+    def _report_progress(self):
+        """Report the root's proof and disproof numbers from its children."""
+        table = self._table
+        phi, delta = self._numbers(self._root_children)[:2]
+        proof, disproof = ((phi, delta) if self._root_to_move == self._attacker
+                           else (delta, phi))
+        elapsed = time.perf_counter() - self._started
+        nodes = self.nodes - self._start_nodes
+        rate = nodes / elapsed if elapsed else 0.0
+        self.report(f"{self._attacker} wins? pn={_show(proof)} dn={_show(disproof)} "
+                    f"nodes={nodes} nodes/sec={rate:.0f} table={len(table)} "
+                    f"collections={table.collections} elapsed={elapsed:.1f}s")
+
+    def save_checkpoint(self):
+        game = self.game
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "board_size": game.board_size,
+            "win_length": game.win_length,
+            "nodes": self.nodes,
+            "tables": {attacker: table.entries for attacker, table in self._tables.items()},
+        }
+        temporary = f"{self.checkpoint}.tmp"
+        with open(temporary, "wb") as checkpoint_file:
+            pickle.dump(data, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.checkpoint)
+
+    def _load_checkpoint(self):
+        with open(self.checkpoint, "rb") as checkpoint_file:
+            data = pickle.load(checkpoint_file)
+        game = self.game
+        if (data.get("version") != CHECKPOINT_VERSION
+                or data.get("board_size") != game.board_size
+                or data.get("win_length") != game.win_length):
+            raise ValueError(f"{self.checkpoint} was saved for another board")
+        self.nodes = data["nodes"]
+        for attacker, entries in data["tables"].items():
+            table = ProofTable(self.table_size)
+            table.entries = entries
+            self._tables[attacker] = table
+
+
+def _other(label: str) -> str:
+    return "O" if label == "X" else "X"
+
+
+def _show(number: int) -> str:
+    return "inf" if number >= INF else str(number)
+
+
+def main(argv=None):
+    from main import TicTacToeGame
+
+    parser = argparse.ArgumentParser(description="Solve a board with df-pn search.")
+    parser.add_argument("--board-size", type=int, default=4)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--first", choices=("X", "O"), default="X",
+                        help="player who moves first")
+    parser.add_argument("--table-size", type=int, default=DEFAULT_TABLE_SIZE,
+                        help="node table entries kept in memory")
+    parser.add_argument("--checkpoint", default=None,
+                        help="file the tables are saved to and resumed from")
+    parser.add_argument("--checkpoint-interval", type=float,
+                        default=DEFAULT_CHECKPOINT_INTERVAL)
+    parser.add_argument("--report-interval", type=float, default=DEFAULT_REPORT_INTERVAL)
+    args = parser.parse_args(argv)
+
+    game = TicTacToeGame(board_size=args.board_size, win_length=args.win_length,
+                         tt_size=0, use_perfect_play=False)
+    solver = ProofNumberSolver(game, args.table_size, args.checkpoint,
+                               args.checkpoint_interval, args.report_interval)
+    started = time.perf_counter()
+    result = solver.solve(args.first)
+    elapsed = time.perf_counter() - started
+    outcome = "draw" if result == "draw" else f"{result} wins"
+    print(f"{args.board_size}x{args.board_size}, {game.win_length} in a row, "
+          f"{args.first} first: {outcome} ({solver.nodes} nodes, {elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
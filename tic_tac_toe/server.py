@@ -0,0 +1,308 @@
+"""Headless game server speaking line-delimited JSON over TCP.
+
+Every request and response is one JSON object on its own line. The
+client always plays "X" and the server answers each move with the
+computer's reply:
+
+    {"op": "new", "board_size": 3, "computer_first": false}
+    {"op": "move", "session": "1", "row": 1, "col": 1}
+    {"op": "state", "session": "1"}
+    {"op": "close", "session": "1"}
+
+"new" also accepts win_length, engine, max_depth and time_budget. A
+request may carry an "id", which is echoed in its response. Failed
+requests are answered with {"ok": false, "error": "..."}.
+
+Sessions outlive the connection that created them, so a client can
+reconnect, and are evicted after idle_timeout seconds without a request.
+Searches run in a thread pool so the event loop keeps serving other
+sessions:
+
+    python server.py --port 8765
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+import json
+import time
+from typing import Dict, Optional
+
+from main import (ENGINES, LARGE_BOARD_DEPTH, LARGE_BOARD_SIZE,
+                  LARGE_BOARD_TIME_BUDGET, Move, SearchCancelled, TicTacToeGame)
+from shared_cache import cache_path
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_SEARCH_THREADS = 4
+MAX_BOARD_SIZE = 19
+# Every session has its own transposition table, so keep them small.
+SESSION_TT_SIZE = 1 << 14
+
+
+class RequestError(Exception):
+    """A request that is answered with an error response."""
+
+
+class Session:
+    """One game and the bookkeeping the server needs for it."""
+
+    def __init__(self, game: TicTacToeGame):
+        self.game = game
+        self.last_used = time.monotonic()
+        # Requests for one session run one at a time.
+        self.lock = asyncio.Lock()
+
+
+def session_state(session_id: str, game: TicTacToeGame) -> dict:
+    """Return the JSON description of a session's position."""
+    size = game.board_size
+    if game.has_winner():
+        row, col = game.winner_combo[0]
+        result = game._cells[row * size + col]
+    elif game.is_tied():
+        result = "tie"
+    else:
+        result = None
+    return {
+        "session": session_id,
+        "board": "/".join(
+            "".join(label or "." for label in game._cells[row * size:(row + 1) * size])
+            for row in range(size)
+        ),
+        "position": game.encode_position(),
+        "result": result,
+    }
+
+
+class GameServer:
+    """Hosts independent TicTacToeGame sessions for many clients."""
+
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 search_threads: int = DEFAULT_SEARCH_THREADS,
+                 cache_dir: Optional[str] = None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.cache_dir = cache_dir
+        self.sessions: Dict[str, Session] = {}
+        self.evicted = 0
+        self._ids = count(1)
+        self._executor = ThreadPoolExecutor(max_workers=search_threads)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._evictor: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        self._evictor = asyncio.ensure_future(self._evict_idle_sessions())
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._evictor is not None:
+            self._evictor.cancel()
+        if self._server is not None:
+            self._server.close()
+        clients = list(self._clients.items())
+        for writer, _ in clients:
+            writer.close()
+        await asyncio.gather(*[task for _, task in clients], return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        for session in self.sessions.values():
+            session.game.cancel_search()
+        self.sessions.clear()
+        self._executor.shutdown()
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter):
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        """Answer one request line."""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "invalid JSON"}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        handlers = {
+            "new": self._new_game,
+            "move": self._move,
+            "state": self._state,
+            "close": self._close_session,
+        }
+        handler = handlers.get(request.get("op"))
+        try:
+            if handler is None:
+                raise RequestError(f"unknown op {request.get('op')!r}")
+            response = await handler(request)
+            response["ok"] = True
+        except (RequestError, ValueError, TypeError) as error:
+            response = {"ok": False, "error": str(error)}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def _new_game(self, request: dict) -> dict:
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("too many sessions")
+        board_size = int(request.get("board_size", 3))
+        if not 3 <= board_size <= MAX_BOARD_SIZE:
+            raise RequestError(f"board_size must be between 3 and {MAX_BOARD_SIZE}")
+        engine = request.get("engine", "minimax")
+        if engine not in ENGINES:
+            raise RequestError(f"engine must be one of {ENGINES}")
+        if engine == "bitboard" and board_size > LARGE_BOARD_SIZE:
+            raise RequestError(f"the bitboard engine only plays boards up to "
+                               f"{LARGE_BOARD_SIZE}x{LARGE_BOARD_SIZE}")
+        max_depth = request.get("max_depth")
+        time_budget = request.get("time_budget")
+        if board_size > LARGE_BOARD_SIZE:
+            # For "auto", max_depth is the least depth worth searching.
+            if engine != "auto":
+                max_depth = max_depth or LARGE_BOARD_DEPTH
+            time_budget = time_budget or LARGE_BOARD_TIME_BUDGET
+        win_length = request.get("win_length") or board_size
+        shared_cache = (cache_path(self.cache_dir, board_size, win_length)
+                        if self.cache_dir else None)
+        game = TicTacToeGame(
+            board_size=board_size, win_length=win_length,
+            engine=engine, max_depth=max_depth, time_budget=time_budget,
+            tt_size=SESSION_TT_SIZE, is_human=not request.get("computer_first", False),
+            shared_cache=shared_cache)
+        session_id = str(next(self._ids))
+        session = Session(game)
+        self.sessions[session_id] = session
+        async with session.lock:
+            if not game.current_player.is_human:
+                return await self._computer_move(session_id, session)
+            return session_state(session_id, game)
+
+    async def _move(self, request: dict) -> dict:
+        session_id, session = self._session(request)
+        game = session.game
+        async with session.lock:
+            row, col = request.get("row"), request.get("col")
+            if not isinstance(row, int) or not isinstance(col, int):
+                raise RequestError("row and col must be integers")
+            if not (0 <= row < game.board_size and 0 <= col < game.board_size):
+                raise RequestError("move is off the board")
+            move = Move(row, col, "X")
+            if not game.is_valid_move(move) or game.is_tied():
+                raise RequestError("illegal move")
+            game.process_move(move)
+            if game.has_winner() or game.is_tied():
+                return session_state(session_id, game)
+            game.toggle_player()
+            return await self._computer_move(session_id, session)
+
+    async def _computer_move(self, session_id: str, session: Session) -> dict:
+        game = session.game
+        loop = asyncio.get_running_loop()
+        try:
+            move = await loop.run_in_executor(self._executor, game._process_computer_move)
+        except SearchCancelled:
+            raise RequestError("session was closed")
+        finally:
+            session.last_used = time.monotonic()
+        if not game.has_winner() and not game.is_tied():
+            game.toggle_player()
+        state = session_state(session_id, game)
+        state["move"] = [move.row, move.col]
+        return state
+
+    async def _state(self, request: dict) -> dict:
+        session_id, session = self._session(request)
+        return session_state(session_id, session.game)
+
+    async def _close_session(self, request: dict) -> dict:
+        session_id, session = self._session(request)
+        self._drop(session_id)
+        return {"session": session_id}
+
+    def _session(self, request: dict):
+        session_id = str(request.get("session"))
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise RequestError(f"unknown session {session_id!r}")
+        session.last_used = time.monotonic()
+        return session_id, session
+
+    def _drop(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.game.cancel_search()
+
+    async def _evict_idle_sessions(self):
+        interval = max(min(self.idle_timeout / 4, 30.0), 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """Drop every session idle for longer than idle_timeout; return how many."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [session_id for session_id, session in self.sessions.items()
+                if session.last_used < cutoff and not session.lock.locked()]
+        for session_id in idle:
+            self._drop(session_id)
+        self.evicted += len(idle)
+        return len(idle)
+
+
+async def serve(host: str, port: int, idle_timeout: float, max_sessions: int,
+                search_threads: int, cache_dir: Optional[str]):
+    server = GameServer(idle_timeout, max_sessions, search_threads, cache_dir)
+    await server.start(host, port)
+    print(f"Serving on {host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve tic-tac-toe games over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="seconds without a request before a session is evicted")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS)
+    parser.add_argument("--search-threads", type=int, default=DEFAULT_SEARCH_THREADS,
+                        help="threads that run engine searches")
+    parser.add_argument("--cache-dir", default=None,
+                        help="directory of persistent search caches, one file per "
+                             "board configuration, shared with other servers")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.idle_timeout,
+                          args.max_sessions, args.search_threads, args.cache_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Persistent search cache shared between processes through a memory-mapped file.
+
+The file is a fixed-size open-addressing table of
+position key -> (value, flag, draft, best move). Keys are the search's
+canonical Zobrist keys, which use a fixed seed and so agree between
+processes. Any number of processes can map the same file and read and
+write it without locks. Each 24-byte slot holds
+
+    check = key ^ value ^ info,  value,  info = move | draft << 16 | flag << 32
+
+and a reader only accepts a slot whose check matches the key it looked
+up. A slot torn by two concurrent writers fails that test and reads as a
+miss, never as a wrong entry. The file stays on disk, so a restarted
+engine starts with everything its predecessors searched:
+
+    game = TicTacToeGame(board_size=4, shared_cache="cache-4x4.bin")
+"""
+import mmap
+import os
+import struct
+import time
+from typing import Dict, NamedTuple, Optional
+
+CACHE_MAGIC = b"TTTCACHE"
+CACHE_VERSION = 1
+DEFAULT_CACHE_SLOTS = 1 << 20
+PROBE_LENGTH = 4
+HEADER = struct.Struct("<8sIIIQ")
+HEADER_SIZE = 64
+ENTRY = struct.Struct("<QqQ")
+MASK64 = (1 << 64) - 1
+NO_MOVE = 0xFFFF
+OPEN_TIMEOUT = 5.0
+
+_open_caches: Dict[str, "SharedCache"] = {}
+
+
+class CacheEntry(NamedTuple):
+    value: int
+    flag: int
+    draft: int
+    move: Optional[int]
+
+
+class SharedCache:
+    """A memory-mapped table of search results for one board configuration.
+
+    slots is rounded up to a power of two. A key is stored in the first
+    free or matching slot of PROBE_LENGTH consecutive slots, replacing the
+    shallowest entry when all of them are taken.
+    """
+
+    def __init__(self, path: str, board_size: int, win_length: int,
+                 slots: int = DEFAULT_CACHE_SLOTS):
+        self.path = path
+        self.board_size = board_size
+        self.win_length = win_length
+        self.slots = 1 << max(slots - 1, 1).bit_length()
+        self.hits = 0
+        self.stores = 0
+        size = HEADER_SIZE + self.slots * ENTRY.size
+        header = HEADER.pack(CACHE_MAGIC, CACHE_VERSION, board_size, win_length,
+                             self.slots)
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            fd = os.open(path, os.O_RDWR)
+            try:
+                self.slots = self._wait_for_header(fd)
+                size = HEADER_SIZE + self.slots * ENTRY.size
+            except Exception:
+                os.close(fd)
+                raise
+        else:
+            # The header is written last so other processes never map a
+            # file that is still being sized.
+            os.ftruncate(fd, size)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, header)
+        try:
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._mask = self.slots - 1
+
+    def _wait_for_header(self, fd: int) -> int:
+        """Return the slot count of an existing file after checking its header."""
+        deadline = time.monotonic() + OPEN_TIMEOUT
+        while True:
+            os.lseek(fd, 0, os.SEEK_SET)
+            data = os.read(fd, HEADER.size)
+            if len(data) == HEADER.size and data[:len(CACHE_MAGIC)] == CACHE_MAGIC:
+                break
+            if time.monotonic() > deadline:
+                raise ValueError(f"{self.path} is not a search cache")
+            time.sleep(0.01)
+        _, version, board_size, win_length, slots = HEADER.unpack(data)
+        if (version, board_size, win_length) != (CACHE_VERSION, self.board_size,
+                                                 self.win_length):
+            raise ValueError(
+                f"{self.path} holds a version {version} cache for {board_size}x"
+                f"{board_size} boards with win length {win_length}")
+        if os.fstat(fd).st_size < HEADER_SIZE + slots * ENTRY.size:
+            raise ValueError(f"{self.path} is truncated")
+        return slots
+
+    def get(self, key: int) -> Optional[CacheEntry]:
+        data = self._map
+        index = key & self._mask
+        for _ in range(PROBE_LENGTH):
+            offset = HEADER_SIZE + index * ENTRY.size
+            check, value, info = ENTRY.unpack_from(data, offset)
+            if info and check ^ (value & MASK64) ^ info == key:
+                self.hits += 1
+                move = info & 0xFFFF
+                return CacheEntry(value, (info >> 32) - 1, (info >> 16 & 0xFFFF) - 1,
+                                  None if move == NO_MOVE else move)
+            index = (index + 1) & self._mask
+        return None
+
+    def store(self, key: int, value: int, flag: int, draft: int,
+              move: Optional[int] = None):
+        data = self._map
+        index = key & self._mask
+        target, target_draft = None, None
+        for _ in range(PROBE_LENGTH):
+            offset = HEADER_SIZE + index * ENTRY.size
+            check, old_value, info = ENTRY.unpack_from(data, offset)
+            if not info or check ^ (old_value & MASK64) ^ info == key:
+                target = offset
+                break
+            old_draft = (info >> 16 & 0xFFFF) - 1
+            if target is None or old_draft < target_draft:
+                target, target_draft = offset, old_draft
+            index = (index + 1) & self._mask
+        value = int(value)
+        info = ((NO_MOVE if move is None else move) | (draft + 1) << 16
+                | (flag + 1) << 32)
+        ENTRY.pack_into(data, target, key ^ (value & MASK64) ^ info, value, info)
+        self.stores += 1
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+
+
+def open_cache(path: str, board_size: int, win_length: int,
+               slots: int = DEFAULT_CACHE_SLOTS) -> SharedCache:
+    """Return this process's SharedCache for path, mapping the file on first use."""
+    key = os.path.abspath(path)
+    cache = _open_caches.get(key)
+    if cache is None or cache._map.closed:
+        cache = _open_caches[key] = SharedCache(path, board_size, win_length, slots)
+    elif (cache.board_size, cache.win_length) != (board_size, win_length):
+        raise ValueError(f"{path} is already open for a different board")
+    return cache
+
+
+def cache_path(directory: str, board_size: int, win_length: int) -> str:
+    """Return the conventional file name of a cache for one board configuration."""
+    return os.path.join(directory, f"cache-{board_size}x{board_size}-k{win_length}.bin")
+
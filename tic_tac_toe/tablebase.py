@@ -0,0 +1,260 @@
+"""Retrograde-analysis tablebases for boards of up to 16 cells.
+
+Every position of the board is solved for both sides to move, working
+backwards from full boards one piece count at a time with NumPy. Each
+position gets one byte that gives the outcome for the side to move and
+the number of plies to the end of the game with best play:
+
+    outcome << 6 | distance     (outcome LOSS, DRAW or WIN; 0 if unreachable)
+
+Positions are indexed by their ``encoding.encode`` key, so a probe reads
+one byte from a memory-mapped file. Generate a table once:
+
+    python tablebase.py --board-size 4 --win-length 3
+
+``TicTacToeGame`` probes the file for its configuration whenever it
+exists (see ``tablebase_path``).
+"""
+import argparse
+import mmap
+from pathlib import Path
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TABLEBASE_MAGIC = b"TTTBASE1"
+TABLEBASE_VERSION = 1
+HEADER = struct.Struct("<8sIII")
+HEADER_SIZE = 64
+MAX_CELLS = 16
+LAYER_CHUNK_SIZE = 1 << 20
+
+UNKNOWN, LOSS, DRAW, WIN = 0, 1, 2, 3
+OUTCOME_NAMES = {LOSS: "loss", DRAW: "draw", WIN: "win"}
+X_CODE, O_CODE = 1, 2
+
+# Scores used while solving: a win in d plies is WIN_SCORE - d, a loss in
+# d plies LOSS_SCORE + d and a draw 0, so larger is always better.
+WIN_SCORE = 1000
+LOSS_SCORE = -1000
+INVALID_SCORE = np.iinfo(np.int16).min
+
+_loaded: Dict[Tuple[int, int], Optional["Tablebase"]] = {}
+
+
+def tablebase_path(board_size: int, win_length: int) -> Path:
+    return Path(__file__).with_name(f"tablebase_{board_size}x{board_size}_k{win_length}.bin")
+
+
+def winning_lines(board_size: int, win_length: int) -> List[List[int]]:
+    """Return the cell indexes of every line of win_length cells."""
+    lines = []
+    for row_step, col_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for row in range(board_size):
+            for col in range(board_size):
+                last_row = row + row_step * (win_length - 1)
+                last_col = col + col_step * (win_length - 1)
+                if 0 <= last_row < board_size and 0 <= last_col < board_size:
+                    lines.append([(row + row_step * i) * board_size + col + col_step * i
+                                  for i in range(win_length)])
+    return lines
+
+
+def _piece_counts(cells: int, code: int) -> np.ndarray:
+    """Return, for every key, how many cells hold code."""
+    counts = np.zeros(1, dtype=np.uint8)
+    for _ in range(cells):
+        # Adding a most significant digit repeats the table three times.
+        counts = np.concatenate([counts + (digit == code) for digit in range(3)])
+    return counts
+
+
+def _digits(keys: np.ndarray, cells: int) -> np.ndarray:
+    digits = np.empty((len(keys), cells), dtype=np.int8)
+    remaining = keys.copy()
+    for cell in range(cells):
+        remaining, digits[:, cell] = np.divmod(remaining, 3)
+    return digits
+
+
+def _encode_scores(scores: np.ndarray, empty: np.ndarray) -> np.ndarray:
+    """Turn solver scores into tablebase bytes."""
+    encoded = np.zeros(len(scores), dtype=np.uint8)
+    wins = (scores > 0) & (scores != INVALID_SCORE)
+    losses = (scores < 0) & (scores != INVALID_SCORE)
+    draws = scores == 0
+    encoded[wins] = WIN << 6 | (WIN_SCORE - scores[wins])
+    encoded[losses] = LOSS << 6 | (scores[losses] - LOSS_SCORE)
+    encoded[draws] = DRAW << 6 | empty[draws]
+    return encoded
+
+
+def solve(board_size: int, win_length: int, verbose: bool = False
+          ) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (X to move, O to move) tablebase bytes of every position."""
+    cells = board_size * board_size
+    if cells > MAX_CELLS:
+        raise ValueError(f"tablebases are limited to {MAX_CELLS} cells, got {cells}")
+    size = 3 ** cells
+    lines = np.array(winning_lines(board_size, win_length), dtype=np.intp)
+    powers = 3 ** np.arange(cells, dtype=np.int64)
+    x_count = _piece_counts(cells, X_CODE)
+    o_count = _piece_counts(cells, O_CODE)
+    pieces = x_count + o_count
+    # scores[code] holds the scores with that player to move.
+    scores = {X_CODE: np.full(size, INVALID_SCORE, dtype=np.int16),
+              O_CODE: np.full(size, INVALID_SCORE, dtype=np.int16)}
+
+    for layer in range(cells, -1, -1):
+        started = time.perf_counter()
+        layer_keys = np.flatnonzero(pieces == layer)
+        for start in range(0, len(layer_keys), LAYER_CHUNK_SIZE):
+            keys = layer_keys[start:start + LAYER_CHUNK_SIZE]
+            digits = _digits(keys, cells)
+            on_lines = digits[:, lines]
+            x_line = (on_lines == X_CODE).all(axis=2).any(axis=1)
+            o_line = (on_lines == O_CODE).all(axis=2).any(axis=1)
+            empty = digits == 0
+            for mover, other in ((X_CODE, O_CODE), (O_CODE, X_CODE)):
+                mover_line, other_line = ((x_line, o_line) if mover == X_CODE
+                                          else (o_line, x_line))
+                surplus = (o_count[keys].astype(np.int16) - x_count[keys]
+                           if mover == X_CODE
+                           else x_count[keys].astype(np.int16) - o_count[keys])
+                # Either player may start, so the mover has the same number
+                # of pieces as the opponent or one fewer.
+                valid = ((surplus == 0) | (surplus == 1)) & ~mover_line
+                result = np.full(len(keys), INVALID_SCORE, dtype=np.int16)
+                result[valid & other_line] = LOSS_SCORE
+                open_positions = valid & ~other_line
+                result[open_positions & (layer == cells)] = 0
+                if layer < cells:
+                    best = np.full(len(keys), INVALID_SCORE, dtype=np.int16)
+                    children = scores[other]
+                    for cell in range(cells):
+                        can_move = open_positions & empty[:, cell]
+                        if not can_move.any():
+                            continue
+                        child = children[keys[can_move] + mover * powers[cell]]
+                        value = np.where(child > 0, 1 - child, -1 - child)
+                        value[child == 0] = 0
+                        value[child == INVALID_SCORE] = INVALID_SCORE
+                        best[can_move] = np.maximum(best[can_move], value)
+                    result[open_positions] = best[open_positions]
+                scores[mover][keys] = result
+        if verbose:
+            print(f"layer {layer:>2}: {len(layer_keys):>9} positions "
+                  f"in {time.perf_counter() - started:.2f}s")
+
+    empty = (cells - pieces).astype(np.uint8)
+    return (_encode_scores(scores[X_CODE], empty),
+            _encode_scores(scores[O_CODE], empty))
+
+
+def write_tablebase(path: Path, board_size: int, win_length: int,
+                    x_to_move: np.ndarray, o_to_move: np.ndarray):
+    with open(path, "wb") as table_file:
+        header = HEADER.pack(TABLEBASE_MAGIC, TABLEBASE_VERSION, board_size, win_length)
+        table_file.write(header.ljust(HEADER_SIZE, b"\0"))
+        table_file.write(x_to_move.tobytes())
+        table_file.write(o_to_move.tobytes())
+
+
+def decode_entry(entry: int) -> Tuple[int, int]:
+    """Return (outcome, distance) of a tablebase byte."""
+    return entry >> 6, entry & 0x3F
+
+
+class Tablebase:
+    """A memory-mapped tablebase file, probed one byte at a time."""
+
+    def __init__(self, path: Path, board_size: int, win_length: int):
+        with open(path, "rb") as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, table_size, table_win = HEADER.unpack_from(self._map, 0)
+        self.size = 3 ** (board_size * board_size)
+        if (magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION
+                or (table_size, table_win) != (board_size, win_length)
+                or len(self._map) != HEADER_SIZE + 2 * self.size):
+            self._map.close()
+            raise ValueError(f"{path} is not a {board_size}x{board_size} "
+                             f"win-length {win_length} tablebase")
+        self.board_size = board_size
+        self.win_length = win_length
+
+    def probe(self, key: int, label: str) -> Tuple[int, int]:
+        """Return (outcome, distance) for label to move; outcome is UNKNOWN if unreachable."""
+        offset = HEADER_SIZE + (self.size if label == "O" else 0)
+        return decode_entry(self._map[offset + key])
+
+    def best_move(self, key: int, cells: Sequence[str], label: str
+                  ) -> Optional[Tuple[int, int, int]]:
+        """Return (cell index, outcome, distance) of label's best move, or None.
+
+        Wins are taken as fast as possible and losses delayed as long as
+        possible; ties keep the earliest cell.
+        """
+        code = O_CODE if label == "O" else X_CODE
+        reply = "X" if label == "O" else "O"
+        best, best_score = None, None
+        for index, cell in enumerate(cells):
+            if cell:
+                continue
+            outcome, distance = self.probe(key + code * 3 ** index, reply)
+            if outcome == UNKNOWN:
+                return None
+            if outcome == LOSS:
+                score = WIN_SCORE - distance - 1
+            elif outcome == WIN:
+                score = LOSS_SCORE + distance + 1
+            else:
+                score = 0
+            if best_score is None or score > best_score:
+                best, best_score = index, score
+        if best is None:
+            return None
+        if best_score > 0:
+            return best, WIN, WIN_SCORE - best_score
+        if best_score < 0:
+            return best, LOSS, best_score - LOSS_SCORE
+        return best, DRAW, cells.count("")
+
+    def close(self):
+        self._map.close()
+
+
+def load_tablebase(board_size: int, win_length: int) -> Optional[Tablebase]:
+    """Return the tablebase for a configuration, or None if it was not generated.
+
+    Each file is mapped once per process and shared by every game.
+    """
+    key = (board_size, win_length)
+    if key not in _loaded:
+        path = tablebase_path(board_size, win_length)
+        tablebase = None
+        if board_size * board_size <= MAX_CELLS and path.exists():
+            try:
+                tablebase = Tablebase(path, board_size, win_length)
+            except (OSError, ValueError, struct.error):
+                pass
+        _loaded[key] = tablebase
+    return _loaded[key]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a tablebase by retrograde analysis.")
+    parser.add_argument("--board-size", type=int, default=4)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    win_length = args.win_length or args.board_size
+    output = args.output or tablebase_path(args.board_size, win_length)
+    started = time.perf_counter()
+    x_to_move, o_to_move = solve(args.board_size, win_length, verbose=True)
+    write_tablebase(output, args.board_size, win_length, x_to_move, o_to_move)
+    for label, table in (("X", x_to_move), ("O", o_to_move)):
+        outcome, distance = decode_entry(int(table[0]))
+        print(f"Empty board, {label} to move: {OUTCOME_NAMES[outcome]} in {distance} plies")
+    print(f"Wrote {output} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,40 @@
+"""Search statistics collected when tracing is enabled."""
+from collections import Counter
+from typing import List
+
+
+class SearchStats:
+    """Counters collected by ``TicTacToeGame(trace=True)``.
+
+    Nothing here is touched while tracing is disabled. Node counts are
+    added once per move from the search's own node counter; the other
+    counters are only updated on cutoffs, terminal positions and
+    transposition hits, never on every node.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = Counter()
+        self.terminal_hits = 0
+        self.evaluations = 0
+        self.tt_hits = 0
+        self.move_nodes: List[int] = []
+        self.move_times: List[float] = []
+
+    def record_move(self, nodes: int, seconds: float):
+        self.nodes += nodes
+        self.move_nodes.append(nodes)
+        self.move_times.append(seconds)
+
+    def as_dict(self) -> dict:
+        """Return the counters as plain, JSON-serialisable values."""
+        return {
+            "moves": len(self.move_times),
+            "nodes": self.nodes,
+            "cutoffs_per_depth": dict(sorted(self.cutoffs.items())),
+            "terminal_hits": self.terminal_hits,
+            "evaluations": self.evaluations,
+            "tt_hits": self.tt_hits,
+            "move_nodes": list(self.move_nodes),
+            "move_times": list(self.move_times),
+        }
@@ -0,0 +1,134 @@
+"""Transposition table and symmetry-canonical Zobrist hashing."""
+from collections import OrderedDict
+import random
+from typing import List, NamedTuple, Optional, Sequence
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_TT_SIZE = 1 << 18
+ZOBRIST_SEED = 20230424
+
+
+class TTEntry(NamedTuple):
+    value: float
+    flag: int
+    draft: int
+
+
+def dihedral_permutations(board_size: int) -> List[List[int]]:
+    """Return the 8 rotations/reflections of the board as cell permutations.
+
+    ``perms[s][index]`` is the cell that ``index`` is mapped to by symmetry
+    ``s``; symmetry 0 is the identity.
+    """
+    last = board_size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    )
+    perms = []
+    for transform in transforms:
+        perm = []
+        for index in range(board_size * board_size):
+            row, col = transform(*divmod(index, board_size))
+            perm.append(row * board_size + col)
+        perms.append(perm)
+    return perms
+
+
+class ZobristHasher:
+    """Zobrist hashing reduced over the dihedral symmetries of the board.
+
+    A position is tracked as 8 hashes, one per symmetry, which are updated
+    incrementally with one XOR each. The minimum of the 8 is the canonical
+    key, so all rotations and reflections share one table entry.
+    """
+
+    def __init__(self, board_size: int, labels: Sequence[str] = ("X", "O"),
+                 seed: int = ZOBRIST_SEED):
+        rng = random.Random(seed)
+        cells = board_size * board_size
+        keys = [{label: rng.getrandbits(64) for label in labels}
+                for _ in range(cells)]
+        self.side_key = rng.getrandbits(64)
+        self.perms = dihedral_permutations(board_size)
+        # cell_keys[index][label] holds the key of that cell's image under
+        # each symmetry, ready to be XORed into the 8 running hashes.
+        self.cell_keys = [
+            {label: tuple(keys[perm[index]][label] for perm in self.perms)
+             for label in labels}
+            for index in range(cells)
+        ]
+        self.inverse_perms = [[0] * cells for _ in self.perms]
+        for perm, inverse in zip(self.perms, self.inverse_perms):
+            for index, image in enumerate(perm):
+                inverse[image] = index
+
+    def hashes(self, current_moves) -> List[int]:
+        """Return the 8 symmetric hashes of a ``List[List[Move]]`` board."""
+        board_size = len(current_moves)
+        hashes = [0] * len(self.perms)
+        for row in current_moves:
+            for move in row:
+                if move.label:
+                    index = move.row * board_size + move.col
+                    hashes = self.update(hashes, index, move.label)
+        return hashes
+
+    def update(self, hashes: List[int], index: int, label: str) -> List[int]:
+        """Return the hashes after toggling label on cell index."""
+        return [h ^ k for h, k in zip(hashes, self.cell_keys[index][label])]
+
+    def toggle(self, hashes: List[int], index: int, label: str):
+        """Toggle label on cell index in hashes, in place."""
+        keys = self.cell_keys[index][label]
+        for symmetry in range(len(hashes)):
+            hashes[symmetry] ^= keys[symmetry]
+
+    def to_canonical(self, hashes: List[int], index: int) -> int:
+        """Return where cell index lies in the orientation of the canonical key."""
+        return self.perms[hashes.index(min(hashes))][index]
+
+    def from_canonical(self, hashes: List[int], index: int) -> int:
+        """Map a cell back from the canonical orientation; see to_canonical()."""
+        return self.inverse_perms[hashes.index(min(hashes))][index]
+
+    def canonical(self, hashes: List[int], is_maximizing: bool) -> int:
+        key = min(hashes)
+        return key ^ self.side_key if is_maximizing else key
+
+
+class TranspositionTable:
+    """A bounded table of search results with least-recently-used eviction."""
+
+    def __init__(self, capacity: int = DEFAULT_TT_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: int) -> Optional[TTEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key: int, value: float, flag: int, draft: int):
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+        elif len(entries) >= self.capacity:
+            entries.popitem(last=False)
+        entries[key] = TTEntry(value, flag, draft)
+
+    def clear(self):
+        self._entries.clear()